@@ -4,6 +4,7 @@ from typing import List, Optional
 import requests
 import logging
 from ..services.aeo_services_consolidated import AEOServiceOrchestrator
+from ..services.openai_service import usage_totals
 from ..services.schema_generator import SchemaGenerator
 
 router = APIRouter(prefix="/api/aeo", tags=["AEOCHECKER"])
@@ -140,3 +141,8 @@ async def health_check():
             "Schema.org Markup Generator"
         ]
     }
+
+@router.get("/usage")
+async def usage():
+    """OpenAI requests and tokens used since startup"""
+    return {"openai": usage_totals()}
@@ -0,0 +1,107 @@
+"""
+AI Prompts
+Prompt text and score tables shared by MultiAIService and OpenAIService
+"""
+
+import logging
+import os
+from functools import lru_cache
+from typing import Tuple
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Cheaper and faster than gpt-3.5-turbo, same JSON mode; AEO_OPENAI_MODEL overrides it
+OPENAI_MODEL = os.getenv("AEO_OPENAI_MODEL", "gpt-4o-mini")
+# Content beyond this many tokens is not sent (keeps token costs down)
+MAX_CONTENT_TOKENS = 500
+# Estimate used without a tokenizer (English averages about 4 characters per token)
+_CHARS_PER_TOKEN = 4
+
+UNDERSTANDING_SYSTEM_PROMPT = "AI content analyst. Analyze for understanding. JSON only."
+
+# Invariant prompt text, built once; only the URL and content vary per call
+_PROMPT_PREFIX = "Analyze this content for AI understanding. URL: "
+_PROMPT_CONTENT_LABEL = "\n\nContent: "
+_PROMPT_INSTRUCTIONS = (
+    "\n\nRate understanding level (Poor/Fair/Good/Excellent), key topics (top 3), "
+    "clarity score (0-100), main issues, and recommendations.\n\n"
+)
+_PROMPT_JSON_SHAPE = """{
+    "understanding_level": "string",
+    "key_topics": ["topic1", "topic2", "topic3"],
+    "clarity_score": number,
+    "main_issues": ["issue1", "issue2"],
+    "recommendations": ["rec1", "rec2"]
+}"""
+_PROMPT_SUFFIX_JSON = _PROMPT_INSTRUCTIONS + "Respond in JSON format:\n" + _PROMPT_JSON_SHAPE
+
+# Score tables
+UNDERSTANDING_SCORES = {'Poor': 20, 'Fair': 40, 'Good': 70, 'Excellent': 90}
+SENTIMENT_SCORES = {'Positive': 80, 'Neutral': 60, 'Negative': 20}
+TONE_SCORES = {'Professional': 90, 'Academic': 85, 'Technical': 80, 'Friendly': 75, 'Casual': 60}
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    """Tokenizer of OPENAI_MODEL, or None without tiktoken or a pre-seeded BPE file"""
+    if tiktoken is None:
+        return None
+    # tiktoken downloads a missing BPE file with no timeout, which must not happen inside
+    # a request: it is only loaded from a TIKTOKEN_CACHE_DIR seeded at deploy time
+    if not os.getenv('TIKTOKEN_CACHE_DIR'):
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(OPENAI_MODEL)
+        except KeyError:
+            # Model newer than the installed tiktoken: current OpenAI models use o200k_base
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logging.warning(f"tiktoken encoding unavailable, estimating tokens from length: {str(e)}")
+        return None
+
+
+@lru_cache(maxsize=64)
+def _encode(text: str) -> Tuple[int, ...]:
+    """Tokens of text; kept, as the same page prefix serves every truncation budget"""
+    return tuple(_encoding().encode(text, disallowed_special=()))
+
+
+def count_tokens(text: str) -> int:
+    """Token count of text (estimated from its length without a tokenizer)"""
+    if _encoding() is None:
+        return -(-len(text) // _CHARS_PER_TOKEN)
+    return len(_encode(text))
+
+
+# One analysis truncates the same page several times (cache keys, prompt, answer budget),
+# so recent results are kept instead of tokenizing the page again
+@lru_cache(maxsize=64)
+def truncate_content(content: str, max_tokens: int = MAX_CONTENT_TOKENS) -> str:
+    """Content cut to max_tokens tokens, with an ellipsis when cut"""
+    encoding = _encoding()
+    if encoding is None:
+        max_length = max_tokens * _CHARS_PER_TOKEN
+        if len(content) > max_length:
+            return content[:max_length] + "..."
+        return content
+    # Every token spans at least one character, so short content needs no tokenizing
+    if len(content) <= max_tokens:
+        return content
+    # Only a prefix is tokenized; it holds the budget unless the text is mostly long runs.
+    # Budgets up to MAX_CONTENT_TOKENS share one prefix, so a page is tokenized once
+    prefix = content[:max(max_tokens, MAX_CONTENT_TOKENS) * 2 * _CHARS_PER_TOKEN]
+    tokens = _encode(prefix)
+    if len(tokens) > max_tokens:
+        return encoding.decode(tokens[:max_tokens]) + "..."
+    if len(prefix) < len(content):
+        return prefix + "..."
+    return content
+
+
+def build_understanding_prompt(url: str, content: str) -> str:
+    """Understanding-analysis prompt; identical text for identical input in every service"""
+    return "".join((_PROMPT_PREFIX, url, _PROMPT_CONTENT_LABEL, truncate_content(content), _PROMPT_SUFFIX_JSON))
@@ -0,0 +1,47 @@
+"""
+HTML Parsing
+lxml document parsing shared by the page analysis services
+"""
+
+from functools import lru_cache
+from typing import Union
+from lxml import etree
+from lxml import html as lxml_html
+
+
+@lru_cache(maxsize=16)
+def _parser_for(encoding: str):
+    """lxml HTML parser pinned to a known charset, so no encoding detection runs"""
+    return lxml_html.HTMLParser(encoding=encoding)
+
+
+def parse_html(html_content: Union[str, bytes], encoding: str = 'utf-8'):
+    """Parse a page into an lxml document tree (empty pages give an empty <html> tree)"""
+    if not html_content or not html_content.strip():
+        return lxml_html.document_fromstring('<html></html>')
+    try:
+        return _parse_document(html_content, encoding)
+    except etree.ParserError:
+        # Markup with no elements (e.g. only comments) is analyzed as an empty page
+        return lxml_html.document_fromstring('<html></html>')
+
+
+def _parse_document(html_content: Union[str, bytes], encoding: str):
+    """lxml document tree of non-empty markup; raises ParserError when it holds no element"""
+    if isinstance(html_content, bytes):
+        try:
+            parser = _parser_for(encoding)
+        except LookupError:
+            # A charset label libxml2 doesn't know: decode in Python and parse as text
+            try:
+                html_content = html_content.decode(encoding, errors='replace')
+            except LookupError:
+                html_content = html_content.decode('utf-8', errors='replace')
+        else:
+            # Raw bytes with the charset from the HTTP layer: decoded by libxml2 directly
+            return lxml_html.document_fromstring(html_content, parser=parser)
+    try:
+        return lxml_html.document_fromstring(html_content)
+    except ValueError:
+        # str input with an XML encoding declaration must be handed to lxml as bytes
+        return lxml_html.document_fromstring(html_content.encode('utf-8'), parser=_parser_for('utf-8'))
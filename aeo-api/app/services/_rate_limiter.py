@@ -0,0 +1,51 @@
+"""
+Client-side Rate Limiter
+Token bucket that keeps outgoing AI provider calls under their rate limits
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+
+class RateLimiter:
+    """Token bucket allowing max_rate units (requests or tokens) per period seconds"""
+
+    def __init__(self, max_rate: float, period: float = 60.0):
+        self.max_rate = max_rate
+        self.period = period
+        self._refill_rate = max_rate / period
+        self._tokens = float(max_rate)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, amount: float) -> float:
+        """Take amount from the bucket; seconds to wait before the reservation is covered"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.max_rate, self._tokens + (now - self._updated) * self._refill_rate)
+            self._updated = now
+            # The bucket may go negative: later callers queue behind this reservation
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self._refill_rate
+
+    async def acquire(self, amount: float = 1) -> None:
+        """Wait until amount units are available"""
+        delay = self._reserve(amount)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def acquire_blocking(self, amount: float = 1) -> None:
+        """Wait until amount units are available, blocking the calling thread"""
+        delay = self._reserve(amount)
+        if delay > 0:
+            time.sleep(delay)
+
+
+# One OpenAI account budget shared by every service calling the OpenAI API, so several
+# services bursting together still stay under it (defaults: entry-tier API limits)
+OPENAI_REQUESTS_LIMITER = RateLimiter(int(os.getenv('OPENAI_RPM', 3500)))
+OPENAI_TOKENS_LIMITER = RateLimiter(int(os.getenv('OPENAI_TPM', 200000)))
@@ -0,0 +1,60 @@
+"""
+AI Response Cache
+Exact-match in-memory cache for paid AI provider responses
+"""
+
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple, Union
+
+_DEFAULT_TTL = 24 * 60 * 60  # seconds
+_DEFAULT_MAX_ENTRIES = 1024
+
+
+class ResponseCache:
+    """LRU cache with a TTL for analysis results, keyed by a hash of model and prompt"""
+
+    def __init__(self, ttl: float = _DEFAULT_TTL, max_entries: int = _DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(model: str, *parts: Union[str, bytes]) -> str:
+        """Cache key for a model and the exact text (or raw bytes) sent to it"""
+        digest = hashlib.blake2b(model.encode('utf-8', 'ignore'), digest_size=16)
+        for part in parts:
+            digest.update(b'\0')
+            digest.update(part if isinstance(part, bytes) else part.encode('utf-8', 'ignore'))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Cached value for key, or None when missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry[0] >= self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            value = entry[1]
+        return copy.deepcopy(value)
+
+    def set(self, key: str, value: Any) -> None:
+        """Store value under key, evicting the least recently used entries"""
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every cached response"""
+        with self._lock:
+            self._entries.clear()
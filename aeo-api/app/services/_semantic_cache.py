@@ -0,0 +1,62 @@
+"""
+Semantic Response Cache
+Reuses an AI analysis for content whose embedding is nearly identical to content already analyzed
+"""
+
+import copy
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_DEFAULT_THRESHOLD = 0.95  # cosine similarity
+_DEFAULT_MAX_ENTRIES = 1024
+
+
+class SemanticCache:
+    """Nearest-neighbour cache over unit-length embeddings, one index per kind of request"""
+
+    def __init__(self, threshold: float = _DEFAULT_THRESHOLD, max_entries: int = _DEFAULT_MAX_ENTRIES):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._indexes: Dict[str, Tuple[np.ndarray, List[Any]]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(embedding: Sequence[float]) -> np.ndarray:
+        """Embedding scaled to unit length, so a dot product is the cosine similarity"""
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, namespace: str, embedding: np.ndarray) -> Optional[Any]:
+        """Value stored with the most similar embedding, or None when nothing is similar enough"""
+        with self._lock:
+            index = self._indexes.get(namespace)
+            if index is None:
+                return None
+            vectors, values = index
+            scores = vectors @ embedding
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                return None
+            value = values[best]
+        return copy.deepcopy(value)
+
+    def add(self, namespace: str, embedding: np.ndarray, value: Any) -> None:
+        """Store value under embedding, dropping the oldest entries past max_entries"""
+        value = copy.deepcopy(value)
+        with self._lock:
+            index = self._indexes.get(namespace)
+            if index is None:
+                vectors, values = embedding[None, :], [value]
+            else:
+                vectors, values = np.vstack((index[0], embedding)), index[1] + [value]
+            if len(values) > self.max_entries:
+                vectors, values = vectors[-self.max_entries:], values[-self.max_entries:]
+            self._indexes[namespace] = (vectors, values)
+
+    def clear(self) -> None:
+        """Drop every cached value"""
+        with self._lock:
+            self._indexes.clear()
@@ -8,6 +8,7 @@ from .competitor_analysis import CompetitorAnalysisService
 from .knowledge_base import KnowledgeBaseService
 from .answerability import AnswerabilityService
 from .crawler_accessibility import CrawlerAccessibilityService
+from ._html import parse_html
 from .structured_data import StructuredDataService
 
 class AEOServiceOrchestrator:
@@ -41,6 +42,21 @@ class AEOServiceOrchestrator:
         """Analyze crawler accessibility"""
         return self.crawler_accessibility_service.analyze_crawler_accessibility(url, html_content)
     
+    def analyze_page(self, url: str, html_content: str) -> dict:
+        """Knowledge base and crawler accessibility analyses from a single parse of the page"""
+        try:
+            tree = parse_html(html_content)
+        except Exception:
+            # Let each service report its own parse failure
+            tree = None
+        # Crawler accessibility first: the knowledge base strips scripts/styles from the tree
+        crawler_accessibility = self.crawler_accessibility_service.analyze_crawler_accessibility(url, html_content, tree=tree)
+        knowledge_base = self.knowledge_base_service.analyze_knowledge_base(url, html_content, tree=tree)
+        return {
+            'knowledge_base': knowledge_base,
+            'crawler_accessibility': crawler_accessibility
+        }
+    
     def analyze_structured_data(self, url: str, html_content: str = None) -> dict:
         """Analyze structured data"""
         return self.structured_data_service.analyze_structured_data(url, html_content)
@@ -61,13 +77,16 @@ class AEOServiceOrchestrator:
                         'url': url
                     }
             
+            # Knowledge base and crawler accessibility share one parsed tree
+            page = self.analyze_page(url, html_content)
+            
             # Run all analyses
             results = {
                 'url': url,
                 'ai_presence': self.analyze_ai_presence(url),
-                'knowledge_base': self.analyze_knowledge_base(url, html_content),
+                'knowledge_base': page['knowledge_base'],
                 'answerability': self.analyze_answerability(url, html_content),
-                'crawler_accessibility': self.analyze_crawler_accessibility(url, html_content),
+                'crawler_accessibility': page['crawler_accessibility'],
                 'structured_data': self.analyze_structured_data(url, html_content),
                 # Competitor analysis now runs automatically (uses DataForSEO API)
                 'competitor_analysis': self.analyze_competitor_landscape(url, competitor_urls or [])
@@ -6,8 +6,8 @@ Analyzes AI bot accessibility and brand recognition
 import re
 import requests
 import logging
-from urllib.parse import urljoin, urlparse
-from typing import Dict, List, Tuple
+from urllib.parse import urljoin, urlparse, urlsplit
+from typing import Dict, List
 try:
     from .openai_service import OpenAIService
     from .multi_ai_service import MultiAIService
@@ -22,26 +22,154 @@ except ImportError:
         sys.path.append(os.path.dirname(__file__))
         from openai_service import OpenAIService
         from multi_ai_service import MultiAIService  
+try:
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
 # import extruct  # Temporarily disabled due to compatibility issues
 
+# Text handed to the AI providers (they truncate far below this anyway)
+_AI_TEXT_MAX_CHARS = 50_000
+
+# Download caps: Google stops reading robots.txt at 500 KiB
+_ROBOTS_MAX_BYTES = 500_000
+_HTML_MAX_BYTES = 2_000_000
+
+# Profile hosts counted towards Organization.sameAs coverage
+_MAJOR_PROFILE_DOMAINS = ('linkedin.com', 'twitter.com', 'x.com', 'youtube.com', 'crunchbase.com', 'github.com', 'facebook.com')
+
+
+def _host(link: str) -> str:
+    """Lowercased hostname of a link, without userinfo or port"""
+    netloc = urlsplit(link).netloc
+    return netloc.rpartition('@')[2].split(':', 1)[0].lower()
+
+
+def _extract_text(html: str, max_chars: int = _AI_TEXT_MAX_CHARS) -> str:
+    """Whitespace-normalised page text, using lxml's C parser when available"""
+    if lxml_html is not None:
+        try:
+            root = lxml_html.fromstring(html)
+            return ' '.join(root.text_content().split())[:max_chars]
+        except Exception as e:
+            logging.debug(f"lxml text extraction failed, falling back to BeautifulSoup: {e}")
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    return ' '.join(soup.get_text().split())[:max_chars]
+
+
+# AI provider whose understanding analysis stands in for each crawler
+_BOT_TO_PROVIDER = {
+    'GPTBot': 'openai',
+    'Google-Extended': 'gemini',
+    'ClaudeBot': 'claude'
+}
+
+
+def _provider_result(ai_understanding: Dict, provider_key: str):
+    """Return a provider's understanding data, or None if missing or failed"""
+    provider_data = ai_understanding.get(provider_key) if provider_key and ai_understanding else None
+    if provider_data and not provider_data.get('error'):
+        return provider_data
+    return None
+
+
+def _platform_record(label: str, is_allowed: bool, provider_data, bot_score: int,
+                     content_score: int, common_details: Dict) -> Dict:
+    """Build the per-bot platform entry shown on the frontend"""
+    # If bot is not allowed, score is 0
+    if not is_allowed:
+        return {
+            'score': 0,
+            'status': 'OFFLINE',
+            'allowed': False,
+            'details': {
+                'robots_allowed': False,
+                'org_schema': False,
+                'sitemap': False,
+                'og_tags': False
+            }
+        }
+    
+    understanding_score = provider_data.get('score', 0) if provider_data is not None else None
+    
+    # Determine display score with priority:
+    # 1. AI Understanding Score (if available) - Most accurate
+    # 2. Content Score + Bot Score - Unique per page
+    # 3. Bot Accessibility Score only - Least unique
+    if understanding_score is not None:
+        display_score = understanding_score
+        score_type = 'ai_understanding'
+    elif content_score > 0:
+        # Blend bot accessibility with content score for uniqueness
+        # Give MORE weight to content score (70%) for more variation
+        display_score = int(bot_score * 0.3 + content_score * 0.7)
+        score_type = 'content_enhanced'
+    else:
+        display_score = bot_score
+        score_type = 'bot_accessibility'
+    
+    logging.debug(f"AI Presence for {label}: bot={bot_score} content={content_score} "
+                  f"ai_understanding={understanding_score} -> {display_score} ({score_type})")
+    
+    # Build platform details
+    platform_details = {
+        'robots_allowed': True,
+        **common_details,
+        'bot_accessibility_score': bot_score,
+        'score_type': score_type,
+        'ai_understanding_available': provider_data is not None
+    }
+    
+    # Add AI understanding details if available
+    if provider_data:
+        platform_details.update({
+            'ai_understanding_score': understanding_score,
+            'understanding_level': provider_data.get('understanding_level'),
+            'clarity_score': provider_data.get('clarity_score'),
+            'key_topics': provider_data.get('key_topics', []),
+            'main_issues': provider_data.get('main_issues', []),
+            'recommendations': provider_data.get('recommendations', [])
+        })
+    
+    return {
+        'score': display_score,
+        'status': 'LIVE',
+        'allowed': True,
+        'details': platform_details
+    }
+
+
 class AIPresenceService:
     """Service for analyzing AI presence and accessibility"""
     
     def __init__(self):
-        self.ai_bot_agents = [
-            ('GPTBot', re.compile(r'(?i)gptbot')),
-            ('Google-Extended', re.compile(r'(?i)google-extended')),
-            ('ClaudeBot', re.compile(r'(?i)claudebot|anthropic-ai')),
-        ]
+        self.ai_bot_labels = ('GPTBot', 'Google-Extended', 'ClaudeBot')
+        self._bot_agent_labels = {
+            'gptbot': 'GPTBot',
+            'google-extended': 'Google-Extended',
+            'claudebot': 'ClaudeBot',
+            'anthropic-ai': 'ClaudeBot'
+        }
         self.openai_service = OpenAIService()
         self.multi_ai_service = MultiAIService()
+        self.session = requests.Session()
+        self.session.headers.update({'Accept-Encoding': 'gzip, deflate'})
     
-    def _fetch_text(self, url: str, timeout: int = 8) -> str:
-        """Fetch text content from URL"""
+    def _fetch_text(self, url: str, timeout: int = 8, max_bytes: int = _HTML_MAX_BYTES) -> str:
+        """Fetch text content from URL, reading at most max_bytes of the body"""
         try:
-            resp = requests.get(url, timeout=timeout)
-            resp.raise_for_status()
-            return resp.text or ''
+            with self.session.get(url, timeout=timeout, stream=True) as resp:
+                resp.raise_for_status()
+                chunks = []
+                total = 0
+                for chunk in resp.iter_content(16384):
+                    chunks.append(chunk)
+                    total += len(chunk)
+                    if total >= max_bytes:
+                        break
+                body = b''.join(chunks)[:max_bytes]
+                return body.decode(resp.encoding or 'utf-8', errors='replace')
         except Exception:
             return ''
     
@@ -199,51 +327,31 @@ class AIPresenceService:
     
     def _parse_robots_rules(self, robots_txt: str) -> Dict:
         """Parse robots.txt rules for AI bots"""
-        checks = {}
-        lines = [l.strip() for l in robots_txt.splitlines()]
+        # default allow unless explicit Disallow: /
+        allowed = {label: True for label in self.ai_bot_labels}
+        has_sitemap = False
+        current_labels = ()
         
-        # Build blocks per user-agent
-        blocks = []
-        current_agents = []
-        current_rules = []
-        
-        for line in lines:
+        for line in robots_txt.splitlines():
+            line = line.strip()
             if not line or line.startswith('#'):
                 continue
-            if line.lower().startswith('user-agent:'):
-                # flush previous
-                if current_agents or current_rules:
-                    blocks.append((current_agents, current_rules))
-                current_agents = [line.split(':', 1)[1].strip()]
-                current_rules = []
-            else:
-                current_rules.append(line)
+            lower = line.lower()
+            if lower.startswith('user-agent:'):
+                agent_name = line.split(':', 1)[1].strip()
+                if agent_name == '*':
+                    current_labels = self.ai_bot_labels
+                else:
+                    label = self._bot_agent_labels.get(agent_name.lower())
+                    current_labels = (label,) if label else ()
+            elif lower.startswith('disallow:'):
+                if lower.split(':', 1)[1].strip() == '/':
+                    for label in current_labels:
+                        allowed[label] = False
+            elif lower.startswith('sitemap:'):
+                has_sitemap = True
         
-        if current_agents or current_rules:
-            blocks.append((current_agents, current_rules))
-
-        def is_allowed_for(agent_name: str) -> bool:
-            # default allow unless explicit Disallow: /
-            agent_allow = True
-            for agents, rules in blocks:
-                # Match wildcard or exact agent
-                if any(a == '*' or a.lower() == agent_name.lower() for a in agents):
-                    for r in rules:
-                        lower = r.lower()
-                        if lower.startswith('disallow:'):
-                            path = lower.split(':', 1)[1].strip()
-                            if path == '/':
-                                agent_allow = False
-                        if lower.startswith('allow:'):
-                            # seeing any allow keeps it allowed
-                            pass
-            return agent_allow
-
-        for label, pattern in self.ai_bot_agents:
-            checks[f'robots_{label.lower()}'] = is_allowed_for(label)
-
-        # Sitemap
-        has_sitemap = any(l.lower().startswith('sitemap:') for l in lines)
+        checks = {f'robots_{label.lower()}': is_allowed for label, is_allowed in allowed.items()}
         checks['sitemap_present'] = has_sitemap
         return checks
     
@@ -291,16 +399,15 @@ class AIPresenceService:
         checks['org_logo_present'] = logo_ok
 
         # sameAs evaluation
-        major_domains = ['linkedin.com', 'twitter.com', 'x.com', 'youtube.com', 'crunchbase.com', 'github.com', 'facebook.com']
         major_count = 0
         for link in same_as_links:
             try:
-                host = urlparse(link).hostname or ''
-            except Exception:
+                host = _host(link)
+            except ValueError:
                 host = ''
-            if any(d in host for d in major_domains):
+            if any(d in host for d in _MAJOR_PROFILE_DOMAINS):
                 major_count += 1
-            if 'wikidata.org' in host or '.org' in host:
+            if '.org' in host:
                 checks['sameas_wikidata_or_wikipedia'] = True
         
         checks['sameas_major_profiles_count'] = major_count
@@ -317,8 +424,8 @@ class AIPresenceService:
         try:
             # robots.txt
             robots_url = urljoin(url, '/robots.txt')
-            robots_txt = self._fetch_text(robots_url)
-            robots_checks = self._parse_robots_rules(robots_txt) if robots_txt else {f'robots_{k[0].lower()}': True for k in self.ai_bot_agents}
+            robots_txt = self._fetch_text(robots_url, max_bytes=_ROBOTS_MAX_BYTES)
+            robots_checks = self._parse_robots_rules(robots_txt) if robots_txt else {f'robots_{label.lower()}': True for label in self.ai_bot_labels}
             
             if robots_txt and 'sitemap_present' not in robots_checks:
                 robots_checks['sitemap_present'] = any(l.lower().startswith('sitemap:') for l in robots_txt.splitlines())
@@ -355,17 +462,10 @@ class AIPresenceService:
             # Always do API calls if API keys exist (regardless of robots.txt)
             # But only award points for bots that are allowed in robots.txt
             ai_understanding = {}
-            bot_to_provider = {
-                'GPTBot': 'openai',
-                'Google-Extended': 'gemini',
-                'ClaudeBot': 'claude'
-            }
             
             if html:
                 # Extract text content for AI analysis
-                from bs4 import BeautifulSoup
-                soup = BeautifulSoup(html, 'html.parser')
-                text_content = soup.get_text()
+                text_content = _extract_text(html)
                 
                 # Get multi-AI understanding analysis (for ALL providers with API keys)
                 # This runs regardless of robots.txt status
@@ -375,20 +475,17 @@ class AIPresenceService:
                 # This ensures blocked bots don't contribute to the overall AI Presence score
                 allowed_provider_scores = []
                 
-                for label, _ in self.ai_bot_agents:
-                    bot_key = label.lower()
-                    is_allowed = robots_checks.get(f'robots_{bot_key}', True)
-                    provider_key = bot_to_provider.get(label)
-                    
+                for label in self.ai_bot_labels:
                     # Only include in overall_score calculation if:
                     # 1. Bot is allowed in robots.txt
                     # 2. We have understanding data from that provider (API key exists)
-                    if is_allowed and provider_key and ai_understanding.get(provider_key):
-                        provider_data = ai_understanding.get(provider_key)
-                        if provider_data and not provider_data.get('error'):
-                            score = provider_data.get('score', 0)
-                            if score > 0:  # Only count valid scores
-                                allowed_provider_scores.append(score)
+                    if not robots_checks.get(f'robots_{label.lower()}', True):
+                        continue
+                    provider_data = _provider_result(ai_understanding, _BOT_TO_PROVIDER.get(label))
+                    if provider_data:
+                        score = provider_data.get('score', 0)
+                        if score > 0:  # Only count valid scores
+                            allowed_provider_scores.append(score)
                 
                 # Calculate average from allowed bots only
                 # This overall_score is used for the 20-point AI understanding category
@@ -406,7 +503,7 @@ class AIPresenceService:
             
             # 30 pts robots + sitemap
             robot_points = 0
-            for label, _ in self.ai_bot_agents:
+            for label in self.ai_bot_labels:
                 if robots_checks.get(f'robots_{label.lower()}', True):
                     robot_points += 4  # up to ~24
             if robots_checks.get('sitemap_present', False):
@@ -458,7 +555,7 @@ class AIPresenceService:
                 recs.append('Add Sitemap URL to robots.txt (e.g., "Sitemap: https://yoursite.com/sitemap.xml") to help AI crawlers discover all pages')
             
             blocked_bots = []
-            for label, _ in self.ai_bot_agents:
+            for label in self.ai_bot_labels:
                 key = f'robots_{label.lower()}'
                 if not robots_checks.get(key, True):
                     blocked_bots.append(label)
@@ -489,7 +586,7 @@ class AIPresenceService:
                             recs.append(ai_rec)
 
             explanation_bits = []
-            explanation_bits.append('Robots allow major AI bots' if all(robots_checks.get(f'robots_{label.lower()}', True) for label, _ in self.ai_bot_agents) else 'Some AI bots are blocked in robots.txt')
+            explanation_bits.append('Robots allow major AI bots' if all(robots_checks.get(f'robots_{label.lower()}', True) for label in self.ai_bot_labels) else 'Some AI bots are blocked in robots.txt')
             explanation_bits.append('Sitemap present' if robots_checks.get('sitemap_present') else 'Sitemap missing in robots.txt')
             explanation_bits.append('Organization schema detected' if content_checks.get('org_schema_present') else 'Organization schema missing')
             explanation_bits.append('Wikidata/Wikipedia present in sameAs' if content_checks.get('sameas_wikidata_or_wikipedia') else 'Wikidata/Wikipedia missing in sameAs')
@@ -500,101 +597,37 @@ class AIPresenceService:
                 explanation_bits.append(f'AI understanding: {ai_understanding["understanding_level"]}')
 
             # Calculate individual bot scores for frontend
-            platforms = {}
-            for label, _ in self.ai_bot_agents:
-                bot_key = label.lower()
-                is_allowed = robots_checks.get(f'robots_{bot_key}', True)
-                
-                # If bot is not allowed, score is 0
-                if not is_allowed:
-                    platforms[label] = {
-                        'score': 0,
-                        'status': 'OFFLINE',
-                        'allowed': False,
-                        'details': {
-                            'robots_allowed': False,
-                            'org_schema': False,
-                            'sitemap': False,
-                            'og_tags': False
-                        }
-                    }
-                else:
-                    # Calculate bot accessibility score (based on robots.txt allowance + technical setup)
-                    bot_score = 20  # Base score for being allowed
-                    if content_checks.get('org_schema_present'):
-                        bot_score += 15  # Organization schema helps
-                    if content_checks.get('sitemap_present'):
-                        bot_score += 10  # Sitemap helps
-                    if content_checks.get('open_graph_present'):
-                        bot_score += 5   # OG tags helps
-                    
-                    # Get AI understanding data for this bot (if API key exists)
-                    provider_key = bot_to_provider.get(label)
-                    understanding_data = None
-                    understanding_score = None
-                    
-                    if provider_key and ai_understanding and ai_understanding.get(provider_key):
-                        provider_data = ai_understanding.get(provider_key)
-                        if provider_data and not provider_data.get('error'):
-                            understanding_data = provider_data
-                            understanding_score = provider_data.get('score', 0)
-                    
-                    # Calculate content-based score as fallback (makes scores unique per page)
-                    content_score = self._calculate_content_score(html, url)
-                    
-                    # DEBUG: Log the scores
-                    print(f"DEBUG AI Presence for {label} on {url}:")
-                    print(f"  - Bot Score: {bot_score}")
-                    print(f"  - Content Score: {content_score}")
-                    print(f"  - AI Understanding Score: {understanding_score}")
-                    
-                    # Determine display score with priority:
-                    # 1. AI Understanding Score (if available) - Most accurate
-                    # 2. Content Score + Bot Score - Unique per page
-                    # 3. Bot Accessibility Score only - Least unique
-                    if understanding_score is not None:
-                        display_score = understanding_score
-                        score_type = 'ai_understanding'
-                        print(f"  - Using AI Understanding: {display_score}")
-                    elif content_score > 0:
-                        # Blend bot accessibility with content score for uniqueness
-                        # Give MORE weight to content score (70%) for more variation
-                        display_score = int(bot_score * 0.3 + content_score * 0.7)
-                        score_type = 'content_enhanced'
-                        print(f"  - Using Content Enhanced: {display_score} = ({bot_score}*0.3 + {content_score}*0.7)")
-                    else:
-                        display_score = bot_score
-                        score_type = 'bot_accessibility'
-                        print(f"  - Using Bot Only: {display_score}")
-                    
-                    # Build platform details
-                    platform_details = {
-                        'robots_allowed': True,
-                        'org_schema': content_checks.get('org_schema_present', False),
-                        'sitemap': robots_checks.get('sitemap_present', False),
-                        'og_tags': content_checks.get('open_graph_present', False),
-                        'bot_accessibility_score': bot_score,
-                        'score_type': score_type,
-                        'ai_understanding_available': understanding_data is not None
-                    }
-                    
-                    # Add AI understanding details if available
-                    if understanding_data:
-                        platform_details.update({
-                            'ai_understanding_score': understanding_score,
-                            'understanding_level': understanding_data.get('understanding_level'),
-                            'clarity_score': understanding_data.get('clarity_score'),
-                            'key_topics': understanding_data.get('key_topics', []),
-                            'main_issues': understanding_data.get('main_issues', []),
-                            'recommendations': understanding_data.get('recommendations', [])
-                        })
-                    
-                    platforms[label] = {
-                        'score': display_score,
-                        'status': 'LIVE',
-                        'allowed': True,
-                        'details': platform_details
-                    }
+            # Fields shared by every allowed bot are read once
+            common_details = {
+                'org_schema': content_checks.get('org_schema_present', False),
+                'sitemap': robots_checks.get('sitemap_present', False),
+                'og_tags': content_checks.get('open_graph_present', False)
+            }
+            
+            # Bot accessibility score (based on robots.txt allowance + technical setup)
+            bot_score = 20  # Base score for being allowed
+            if content_checks.get('org_schema_present'):
+                bot_score += 15  # Organization schema helps
+            if content_checks.get('sitemap_present'):
+                bot_score += 10  # Sitemap helps
+            if content_checks.get('open_graph_present'):
+                bot_score += 5   # OG tags helps
+            
+            platform_rows = [
+                (label, robots_checks.get(f'robots_{label.lower()}', True),
+                 _provider_result(ai_understanding, _BOT_TO_PROVIDER.get(label)))
+                for label in self.ai_bot_labels
+            ]
+            
+            # Content-based score is the fallback for allowed bots without AI data
+            content_score = 0
+            if any(is_allowed and provider_data is None for _, is_allowed, provider_data in platform_rows):
+                content_score = self._calculate_content_score(html, url)
+            
+            platforms = {
+                label: _platform_record(label, is_allowed, provider_data, bot_score, content_score, common_details)
+                for label, is_allowed, provider_data in platform_rows
+            }
 
             return {
                 'score': score,
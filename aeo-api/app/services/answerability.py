@@ -5,12 +5,17 @@ Analyzes content for Q&A patterns and answerability
 
 import re
 from typing import Dict, List
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, Tag
 try:
     from .openai_service import OpenAIService
 except ImportError:
     from openai_service import OpenAIService
 
+# FAQ detection, shared across calls
+_FAQ_RE = re.compile(r'faq|question|q&a', re.IGNORECASE)
+_HEADING_TAGS = frozenset({'h1', 'h2', 'h3', 'h4', 'h5', 'h6'})
+_CONTAINER_TAGS = frozenset({'div', 'section', 'dl', 'ul', 'ol'})
+
 class AnswerabilityService:
     """Service for analyzing answerability and Q&A content"""
     
@@ -81,22 +86,25 @@ class AnswerabilityService:
         try:
             soup = BeautifulSoup(html_content, 'html.parser')
             
-            # Look for FAQ patterns
-            faq_indicators = [
-                soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'], string=re.compile(r'faq|question|q&a', re.IGNORECASE)),
-                soup.find_all(['div', 'section'], class_=re.compile(r'faq|question|q&a', re.IGNORECASE)),
-                soup.find_all(['dl', 'ul', 'ol'], class_=re.compile(r'faq|question|q&a', re.IGNORECASE))
-            ]
-            
+            # Look for FAQ headings and containers in a single walk of the tree
             faq_elements = []
-            for indicator_list in faq_indicators:
-                faq_elements.extend(indicator_list)
+            for element in soup.descendants:
+                if not isinstance(element, Tag):
+                    continue
+                name = element.name
+                if name in _HEADING_TAGS:
+                    if element.string and _FAQ_RE.search(element.string):
+                        faq_elements.append(element)
+                elif name in _CONTAINER_TAGS:
+                    classes = element.get('class')
+                    if classes and _FAQ_RE.search(' '.join(classes)):
+                        faq_elements.append(element)
             
             # Count Q&A pairs
             qa_pairs = 0
             for element in faq_elements:
                 # Look for question-answer patterns
-                if element.name in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']:
+                if element.name in _HEADING_TAGS:
                     # Check if next sibling contains answer-like content
                     next_sibling = element.find_next_sibling()
                     if next_sibling and len(next_sibling.get_text().strip()) > 20:
@@ -165,9 +173,14 @@ class AnswerabilityService:
             
             # AI-Powered Answerability Analysis (NEW)
             ai_answerability = {}
+            tone_analysis = {}
             if text_content:
-                # Get AI feedback on answerability
-                ai_answerability = self.openai_service.analyze_answerability(text_content, [q['question'] for q in questions])
+                # Get AI feedback on answerability and tone in a single request
+                ai_analysis = self.openai_service.analyze_all(
+                    text_content, questions=[q['question'] for q in questions], analyses=('answerability', 'tone')
+                )
+                ai_answerability = ai_analysis['answerability']
+                tone_analysis = ai_analysis['tone']
                 
                 # Enhance score with AI analysis
                 if ai_answerability and 'ai_answerability_score' in ai_answerability:
@@ -196,11 +209,6 @@ class AnswerabilityService:
                         if not any(word in ai_rec.lower() for word in ['retry', 'error', 'failed', 'check']):
                             recommendations.append(ai_rec)
             
-            # Add tone analysis
-            tone_analysis = {}
-            if text_content:
-                tone_analysis = self.openai_service.analyze_tone_and_sentiment(text_content)
-            
             return {
                 'score': score,
                 'questions': questions,
@@ -6,9 +6,23 @@ Analyzes competitor backlinks and domain authority
 import traceback
 from typing import List, Dict, Any, Tuple, Optional
 from collections import Counter
+import numpy as np
 from .dataforseo_client import DataForSEOClient
 
 
+def _rowvals(item: Dict[str, Any]) -> Tuple[int, int, float, int]:
+    """Numeric metrics of a referring-domain row, with API defaults filled in"""
+    get = item.get
+    # The API sends null (e.g. "rank": null for unranked domains), which would become NaN
+    rank = get("rank")
+    return (
+        get("referring_domains") or 0,
+        get("referring_domains_nofollow") or 0,
+        get("backlinks_spam_score") or 0,
+        50 if rank is None else rank  # Default rank if not provided
+    )
+
+
 class CompetitorAnalysisService:
     """
     Service for analyzing competitor landscape based on backlinks data from DataForSEO API
@@ -56,7 +70,9 @@ class CompetitorAnalysisService:
             max_limit = limit
             initial_fetch_limit = limit
         else:
-            # Automatic logic: max 100, but use all if <= 100
+            # Automatic logic: max 100, but use all if <= 100.
+            # DataForSEO bills per returned row, so ask for 100 and refetch only
+            # the rare small profile that comes back short
             max_limit = 100
             initial_fetch_limit = 100
         
@@ -140,6 +156,18 @@ class CompetitorAnalysisService:
         Returns:
             Dictionary containing all calculated metrics
         """
+        return self._calculate_metrics_and_counts(backlinks)[0]
+    
+    def _calculate_metrics_and_counts(self, backlinks: List[Dict[str, Any]]) -> Tuple[Dict[str, float], Counter]:
+        """
+        Calculate the metrics and the per-domain referring-domain counts in one pass
+        
+        Args:
+            backlinks: List of backlinks data from DataForSEO API
+            
+        Returns:
+            Tuple of (metrics dictionary, Counter of referring domains per domain)
+        """
         if not backlinks:
             return {
                 'total_referring_domains': 0,
@@ -148,29 +176,23 @@ class CompetitorAnalysisService:
                 'diversity_score': 0,
                 'spam_score': 0,
                 'normalized_metrics': {}
-            }
+            }, Counter()
         
-        # Initialize counters
-        total_referring_domains = 0
-        total_dofollow = 0
-        total_quality = 0
-        total_spam = 0
+        # Single pass over the rows: numeric columns, diversity data and domain counts
+        rows = []
+        domain_count = Counter()
         tlds = set()
         countries = set()
         platforms = set()
+        append_row = rows.append
         
         for item in backlinks:
-            # Extract key metrics from each backlink item
-            ref_domains = item.get("referring_domains", 0)
-            nofollow = item.get("referring_domains_nofollow", 0)
-            spam = item.get("backlinks_spam_score", 0)
-            rank = item.get("rank", 50)  # Default rank if not provided
+            row = _rowvals(item)
+            append_row(row)
             
-            # Accumulate totals
-            total_referring_domains += ref_domains
-            total_dofollow += max(0, ref_domains - nofollow)  # Dofollow = total - nofollow
-            total_spam += spam
-            total_quality += max(0, 100 - rank)  # Lower rank = higher quality
+            domain = item.get("domain")
+            if domain:
+                domain_count[domain] += row[0]
             
             # Collect diversity data (handle None values)
             tld_data = item.get("referring_links_tld") or {}
@@ -184,9 +206,16 @@ class CompetitorAnalysisService:
             if isinstance(platforms_data, dict):
                 platforms.update(k for k in platforms_data.keys() if k)
         
+        ref_domains, nofollow, spam, rank = np.array(rows, dtype=np.float64).T
+        
+        # Accumulate totals
+        total_referring_domains = int(ref_domains.sum())
+        total_dofollow = int(np.maximum(0, ref_domains - nofollow).sum())  # Dofollow = total - nofollow
+        total_quality = int(np.maximum(0, 100 - rank).sum())  # Lower rank = higher quality
+        
         # Calculate averages
-        avg_spam = total_spam / len(backlinks) if backlinks else 0
-        avg_quality = total_quality / len(backlinks) if backlinks else 0
+        avg_spam = float(spam.mean())
+        avg_quality = total_quality / len(rows)
         
         # Calculate diversity score (capped at 20 points)
         diversity_score = min(20, (len(tlds) + len(countries) + len(platforms)) * 2)
@@ -203,7 +232,7 @@ class CompetitorAnalysisService:
             'normalized_metrics': self._normalize_metrics(
                 total_referring_domains, total_dofollow, avg_quality, diversity_score, avg_spam
             )
-        }
+        }, domain_count
     
     def _normalize_metrics(self, ref_domains: int, dofollow: int, quality: float, 
                           diversity: float, spam: float) -> Dict[str, float]:
@@ -221,10 +250,10 @@ class CompetitorAnalysisService:
             Dictionary of normalized metrics
         """
         # Normalize referring domains (max 10 domains = 100 points)
-        normalized_ref_domains = min(100, (ref_domains / max(ref_domains, 10)) * 100)
+        normalized_ref_domains = min(100, ref_domains * 10)
         
         # Normalize dofollow backlinks (max 10 dofollow = 100 points)
-        normalized_dofollow = min(100, (dofollow / max(dofollow, 10)) * 100)
+        normalized_dofollow = min(100, dofollow * 10)
         
         # Quality is already on 0-100 scale
         normalized_quality = min(100, quality)
@@ -374,14 +403,14 @@ class CompetitorAnalysisService:
         print(f"Fetched {len(referring_domains)} referring domains")
         print(f"Total individual backlinks: {total_individual_backlinks}")
         
-        # Calculate metrics
-        metrics = self.calculate_metrics(referring_domains)
+        # Calculate metrics (and the competitor counts, from the same pass)
+        metrics, domain_count = self._calculate_metrics_and_counts(referring_domains)
         
         # Calculate final score
         score = self.calculate_competitor_landscape_score(metrics)
         
         # Identify top competitors
-        top_competitors = self.identify_top_competitors(referring_domains)
+        top_competitors = domain_count.most_common(5)
         
         # Generate recommendations
         recommendations = self._generate_recommendations(score, metrics, top_competitors)
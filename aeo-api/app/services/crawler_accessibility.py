@@ -4,13 +4,51 @@ Analyzes content accessibility for web crawlers
 """
 
 import re
-from typing import Dict, List
-from bs4 import BeautifulSoup
+from typing import Dict, List, Union
+from lxml import etree
+try:
+    from ._html import parse_html
+    from ._response_cache import ResponseCache
+except ImportError:
+    from _html import parse_html
+    from _response_cache import ResponseCache
+
+# Compiled once: every crawler-relevant head element in a single document-order traversal
+_HEAD_XPATH = etree.XPath(
+    "//title"
+    " | //meta[@name='robots' or @name='description']"
+    " | //link[contains(concat(' ', normalize-space(@rel), ' '), ' canonical ')]"
+    " | //meta[@property='og:title' or @property='og:description' or @property='og:url']"
+)
+
+
+def _collect_head_elements(root) -> Dict:
+    """First title/robots/description/canonical/og:* element of a page, from one XPath pass"""
+    found = {}
+    for element in _HEAD_XPATH(root):
+        if element.tag == 'title':
+            found.setdefault('title', element)
+        elif element.tag == 'link':
+            found.setdefault('canonical', element)
+        else:
+            name = element.get('name')
+            if name == 'robots' or name == 'description':
+                found.setdefault(name, element)
+            prop = element.get('property')
+            if prop:
+                found.setdefault(prop, element)
+    return found
+
+
+# Repeat pages are answered from memory: the result depends only on the HTML and its charset
+_RESULT_CACHE_MAX_ENTRIES = 512
+
 
 class CrawlerAccessibilityService:
     """Service for analyzing crawler accessibility"""
     
     def __init__(self):
+        self._result_cache = ResponseCache(max_entries=_RESULT_CACHE_MAX_ENTRIES)
         self.crawler_indicators = [
             'robots.txt',
             'sitemap.xml',
@@ -22,15 +60,13 @@ class CrawlerAccessibilityService:
             'meta description'
         ]
     
-    def _analyze_robots_meta(self, html_content: str) -> Dict[str, any]:
+    def _analyze_robots_meta(self, head: Dict) -> Dict[str, any]:
         """Analyze robots meta tags"""
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
             # Find robots meta tag
-            robots_meta = soup.find('meta', attrs={'name': 'robots'})
+            robots_meta = head.get('robots')
             
-            if robots_meta:
+            if robots_meta is not None:
                 content = robots_meta.get('content', '').lower()
                 return {
                     'has_robots_meta': True,
@@ -56,27 +92,25 @@ class CrawlerAccessibilityService:
                 'allows_archive': True
             }
     
-    def _analyze_meta_tags(self, html_content: str) -> Dict[str, any]:
+    def _analyze_meta_tags(self, head: Dict) -> Dict[str, any]:
         """Analyze important meta tags for crawlers"""
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
             # Title tag
-            title_tag = soup.find('title')
-            title = title_tag.get_text().strip() if title_tag else ''
+            title_tag = head.get('title')
+            title = title_tag.text_content().strip() if title_tag is not None else ''
             
             # Meta description
-            description_meta = soup.find('meta', attrs={'name': 'description'})
-            description = description_meta.get('content', '').strip() if description_meta else ''
+            description_meta = head.get('description')
+            description = description_meta.get('content', '').strip() if description_meta is not None else ''
             
             # Canonical URL
-            canonical_link = soup.find('link', attrs={'rel': 'canonical'})
-            canonical = canonical_link.get('href', '') if canonical_link else ''
+            canonical_link = head.get('canonical')
+            canonical = canonical_link.get('href', '') if canonical_link is not None else ''
             
             # Open Graph tags
-            og_title = soup.find('meta', attrs={'property': 'og:title'})
-            og_description = soup.find('meta', attrs={'property': 'og:description'})
-            og_url = soup.find('meta', attrs={'property': 'og:url'})
+            og_title = head.get('og:title')
+            og_description = head.get('og:description')
+            og_url = head.get('og:url')
             
             return {
                 'title': title,
@@ -87,10 +121,10 @@ class CrawlerAccessibilityService:
                 'has_description': len(description) > 0,
                 'canonical': canonical,
                 'has_canonical': len(canonical) > 0,
-                'og_title': og_title.get('content', '') if og_title else '',
-                'og_description': og_description.get('content', '') if og_description else '',
-                'og_url': og_url.get('content', '') if og_url else '',
-                'has_og_tags': any([og_title, og_description, og_url])
+                'og_title': og_title.get('content', '') if og_title is not None else '',
+                'og_description': og_description.get('content', '') if og_description is not None else '',
+                'og_url': og_url.get('content', '') if og_url is not None else '',
+                'has_og_tags': any(tag is not None for tag in (og_title, og_description, og_url))
             }
         except Exception:
             return {
@@ -108,27 +142,27 @@ class CrawlerAccessibilityService:
                 'has_og_tags': False
             }
     
-    def _analyze_images(self, html_content: str) -> Dict[str, any]:
+    def _analyze_images(self, root) -> Dict[str, any]:
         """Analyze image accessibility for crawlers"""
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            images = soup.find_all('img')
-            
-            total_images = len(images)
+            # Stream <img> elements straight off the tree; no intermediate list
+            total_images = 0
             images_with_alt = 0
             images_with_title = 0
             images_with_both = 0
             
-            for img in images:
-                has_alt = bool(img.get('alt', '').strip())
-                has_title = bool(img.get('title', '').strip())
+            for img in root.iter('img'):
+                total_images += 1
+                attrib = img.attrib
+                has_alt = bool(attrib.get('alt', '').strip())
+                has_title = bool(attrib.get('title', '').strip())
                 
                 if has_alt:
                     images_with_alt += 1
+                    if has_title:
+                        images_with_both += 1
                 if has_title:
                     images_with_title += 1
-                if has_alt and has_title:
-                    images_with_both += 1
             
             return {
                 'total_images': total_images,
@@ -148,32 +182,30 @@ class CrawlerAccessibilityService:
                 'title_coverage': 0
             }
     
-    def _analyze_links(self, html_content: str) -> Dict[str, any]:
+    def _analyze_links(self, root) -> Dict[str, any]:
         """Analyze link structure for crawlers"""
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            links = soup.find_all('a', href=True)
-            
-            total_links = len(links)
-            internal_links = 0
+            # Stream <a> elements straight off the tree; only those with an href count
+            total_links = 0
             external_links = 0
             links_with_text = 0
             links_with_title = 0
             
-            for link in links:
-                href = link.get('href', '')
-                text = link.get_text().strip()
-                title = link.get('title', '')
+            for link in root.iter('a'):
+                attrib = link.attrib
+                href = attrib.get('href')
+                if href is None:
+                    continue
+                total_links += 1
                 
-                if href.startswith('http'):
+                if href[:4] == 'http':
                     external_links += 1
-                else:
-                    internal_links += 1
-                
-                if text:
-                    links_with_text += 1
-                if title:
+                if attrib.get('title'):
                     links_with_title += 1
+                if link.text_content().strip():
+                    links_with_text += 1
+            
+            internal_links = total_links - external_links
             
             return {
                 'total_links': total_links,
@@ -223,14 +255,52 @@ class CrawlerAccessibilityService:
         
         return min(100, score)
     
-    def analyze_crawler_accessibility(self, url: str, html_content: str) -> Dict:
+    def clear_cache(self) -> None:
+        """Drop all cached analysis results"""
+        self._result_cache.clear()
+    
+    def analyze_crawler_accessibility(self, url: str, html_content: Union[str, bytes], encoding: str = 'utf-8', tree=None) -> Dict:
+        """Analyze crawler accessibility, cached per HTML content hash
+        
+        html_content may be the raw response bytes; encoding is then the charset
+        reported by the HTTP layer and is used instead of detecting one.
+        tree may be the lxml document already parsed from html_content.
+        """
+        # Raw bytes decode differently per charset, so it is part of the key
+        key = ResponseCache.key('crawler_accessibility', encoding.lower(), html_content or '')
+        cached = self._result_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        if tree is not None:
+            result = self.analyze_tree(url, tree)
+        else:
+            result = self._analyze_crawler_accessibility(url, html_content, encoding)
+        
+        if 'error' not in result:
+            self._result_cache.set(key, result)
+        return result
+    
+    def _analyze_crawler_accessibility(self, url: str, html_content: Union[str, bytes], encoding: str = 'utf-8') -> Dict:
         """Analyze crawler accessibility"""
         try:
+            # Parse once; every analyzer queries the same tree
+            root = parse_html(html_content, encoding)
+        except Exception as e:
+            return self._failed_result(e)
+        return self.analyze_tree(url, root)
+    
+    def analyze_tree(self, url: str, root) -> Dict:
+        """Analyze crawler accessibility of an already parsed lxml document, uncached (the tree is not modified)"""
+        try:
+            # Head lookups share one compiled-selector pass (first match of each kind, as find() did)
+            head = _collect_head_elements(root)
+            
             # Analyze different aspects
-            robots_meta = self._analyze_robots_meta(html_content)
-            meta_tags = self._analyze_meta_tags(html_content)
-            images = self._analyze_images(html_content)
-            links = self._analyze_links(html_content)
+            robots_meta = self._analyze_robots_meta(head)
+            meta_tags = self._analyze_meta_tags(head)
+            images = self._analyze_images(root)
+            links = self._analyze_links(root)
             
             # Calculate overall score
             score = self._calculate_accessibility_score(robots_meta, meta_tags, images, links)
@@ -263,12 +333,17 @@ class CrawlerAccessibilityService:
             }
             
         except Exception as e:
-            return {
-                'score': 0,
-                'error': f'Crawler accessibility analysis failed: {str(e)}',
-                'robots_meta': {},
-                'meta_tags': {},
-                'images': {},
-                'links': {},
-                'recommendations': ['Retry analysis']
-            }
+            return self._failed_result(e)
+    
+    @staticmethod
+    def _failed_result(e: Exception) -> Dict:
+        """Result returned when the analysis raises"""
+        return {
+            'score': 0,
+            'error': f'Crawler accessibility analysis failed: {str(e)}',
+            'robots_meta': {},
+            'meta_tags': {},
+            'images': {},
+            'links': {},
+            'recommendations': ['Retry analysis']
+        }
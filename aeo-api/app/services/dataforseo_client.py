@@ -3,12 +3,47 @@ DataForSEO REST Client
 Handles API communication with DataForSEO
 """
 
-from http.client import HTTPSConnection
+import asyncio
 from base64 import b64encode
 from json import loads, dumps
 import os
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+try:
+    # Responses carry hundreds of nested items; orjson parses them several times faster
+    from orjson import loads as _loads_response
+except ImportError:
+    _loads_response = loads
+try:
+    import httpx
+except ImportError:
+    httpx = None
+try:
+    import h2  # noqa: F401 - enables HTTP/2 on the async client
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
+# Seconds before a stalled call gives up its pooled connection
+_TIMEOUT = 30.0
+# Every API call is a billed POST: it is re-sent only when the server cannot have run it,
+# i.e. the connection never opened or the request was rate limited (429). A read error
+# or 5xx may come after the task was accepted, so those are never retried.
+_RETRY = Retry(
+    total=2,
+    connect=2,
+    read=0,
+    other=0,
+    backoff_factor=0.3,
+    status_forcelist=[429],
+    allowed_methods=frozenset({'GET', 'POST'}),
+    respect_retry_after_header=True,
+    # After the last attempt the error body is parsed like any other response
+    raise_on_status=False
+)
 
 class DataForSEOClient:
     """REST client for DataForSEO API"""
@@ -32,6 +67,28 @@ class DataForSEOClient:
                 "Set DATAFORSEO_USERNAME and DATAFORSEO_PASSWORD environment variables "
                 "or pass them to the constructor."
             )
+        
+        # Credentials are fixed for the client's lifetime: encode the Basic auth header once
+        self._auth_header = 'Basic ' + b64encode(
+            f"{self.username}:{self.password}".encode("ascii")
+        ).decode("ascii")
+        
+        # Keep-alive connection pool shared by every call: one TLS handshake, not one per request
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=10,
+            max_retries=_RETRY
+        )
+        self.session.mount('https://', adapter)
+        # Compressed responses; the request body itself is sent as plain JSON
+        self.session.headers.update({
+            'Authorization': self._auth_header,
+            'Accept-Encoding': 'gzip'
+        })
+        
+        # Created on first async call, so sync-only users never open it
+        self._async_client = None
     
     def request(self, path: str, method: str, data: Optional[Any] = None) -> Dict[str, Any]:
         """
@@ -45,20 +102,9 @@ class DataForSEOClient:
         Returns:
             API response as dictionary
         """
-        connection = HTTPSConnection(self.domain)
-        try:
-            base64_bytes = b64encode(
-                f"{self.username}:{self.password}".encode("ascii")
-            ).decode("ascii")
-            headers = {
-                'Authorization': f'Basic {base64_bytes}',
-                'Content-Encoding': 'gzip'
-            }
-            connection.request(method, path, headers=headers, body=data)
-            response = connection.getresponse()
-            return loads(response.read().decode())
-        finally:
-            connection.close()
+        # requests transparently un-gzips the body; parse the raw bytes
+        response = self.session.request(method, f"https://{self.domain}{path}", data=data, timeout=_TIMEOUT)
+        return _loads_response(response.content)
     
     def get(self, path: str) -> Dict[str, Any]:
         """Make a GET request"""
@@ -71,4 +117,45 @@ class DataForSEOClient:
         else:
             data_str = dumps(data)
         return self.request(path, 'POST', data_str)
+    
+    def _get_async_client(self):
+        """Shared httpx.AsyncClient, multiplexed over HTTP/2 when h2 is installed"""
+        if self._async_client is None:
+            if httpx is None:
+                raise RuntimeError("httpx is required for async DataForSEO requests")
+            self._async_client = httpx.AsyncClient(
+                base_url=f"https://{self.domain}",
+                http2=_HTTP2_AVAILABLE,
+                headers={
+                    'Authorization': self._auth_header,
+                    'Accept-Encoding': 'gzip'
+                },
+                limits=httpx.Limits(max_connections=10, max_keepalive_connections=10),
+                timeout=_TIMEOUT
+            )
+        return self._async_client
+    
+    async def apost(self, path: str, data: Any) -> Dict[str, Any]:
+        """Make a POST request without blocking the event loop"""
+        data_str = data if isinstance(data, str) else dumps(data)
+        response = await self._get_async_client().post(path, content=data_str)
+        return _loads_response(response.content)
+    
+    async def post_many(self, items: List[Tuple[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Make several POST requests concurrently
+        
+        Args:
+            items: (path, data) pairs, one per request
+            
+        Returns:
+            API responses, in the same order as items
+        """
+        return await asyncio.gather(*(self.apost(path, data) for path, data in items))
+    
+    async def aclose(self) -> None:
+        """Close the async client's connections"""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
 
@@ -6,139 +6,255 @@ Analyzes content for entities, facts, and clarity
 import re
 from typing import Dict, List, Set
 from urllib.parse import urlparse
+from lxml import etree
+from lxml import html as lxml_html
+try:
+    from ._response_cache import ResponseCache
+except ImportError:
+    from _response_cache import ResponseCache
+
+# Patterns are compiled once at import time and shared by every service instance.
+# Proper-noun patterns are case-sensitive: under IGNORECASE [A-Z][a-z]+ matches any word.
+# Multi-word names are capped at six words so long capitalised runs can't backtrack quadratically.
+_ENTITY_PATTERNS = {
+    'people': re.compile(r'\b[A-Z][a-z]+ [A-Z][a-z]+\b'),  # Simple name pattern
+    'places': re.compile(r'\b[A-Z][a-z]+(?: [A-Z][a-z]+){0,5}\b'),  # Place names
+    'organizations': re.compile(r'\b[A-Z][a-z]+(?: [A-Z][a-z]+){0,5} (?:Inc|Corp|LLC|Ltd|Company|Organization)\b'),
+    'dates': re.compile(r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}\b', re.IGNORECASE),
+    'years': re.compile(r'\b(?:19|20)\d{2}\b'),
+    'percentages': re.compile(r'\b\d+(?:\.\d+)?%\b'),
+    'numbers': re.compile(r'\b\d+(?:,\d{3})*(?:\.\d+)?\b')
+}
+# Entity types that can only match where the text has a capital letter
+_PROPER_NOUN_TYPES = frozenset({'people', 'places', 'organizations'})
+# Entity types that can only match where the text has a digit (percentages also need '%')
+_NUMERIC_ENTITY_TYPES = frozenset({'dates', 'years', 'percentages', 'numbers'})
+_CAPITAL_RE = re.compile(r'[A-Z]')
+
+# Numeric fact indicators overlap (a year is also a number), so each keeps its own count.
+# All of them need a digit; each is paired with a literal it cannot match without, so a
+# plain substring test skips scans that would find nothing.
+_FACT_NUMERIC_PATTERNS = [(re.compile(p, re.IGNORECASE), literal) for p, literal in (
+    (r'\b\d+(?:,\d{3})*(?:\.\d+)?\b', ''),  # Numbers
+    (r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}\b', ''),  # Dates
+    (r'\b(?:19|20)\d{2}\b', ''),  # Years
+    (r'\b\d+(?:\.\d+)?%\b', '%'),  # Percentages
+)]
+_DIGITS = '0123456789'
+
+_FACT_TRIGGER_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
+    r'\b\d+(?:,\d{3})*(?:\.\d+)?\b',
+    r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}\b',
+    r'\b(?:19|20)\d{2}\b',
+    r'\b\d+(?:\.\d+)?%\b',
+    r'\b(?:according to|studies show|research indicates|data shows)\b',
+)]
+
+# Any trigger at all, in one search; the specific trigger is only resolved for kept sentences
+_FACT_TRIGGER_RE = re.compile('|'.join(f'(?:{p.pattern})' for p in _FACT_TRIGGER_PATTERNS), re.IGNORECASE)
+
+# Terms that suggest JS/analytics/noise to skip, fused into a single alternation
+_NOISE_RE = re.compile('|'.join(f'(?:{p})' for p in (
+    r'\b(?:window|document|function|var|let|const|gtag|dataLayer|google-analytics|googletag)\b',
+    r'\b(?:jQuery|\$\(|owlCarousel|addEventListener|onclick|script)\b',
+    r'\bmailto:|@\w+\.\w+\b',
+    r'\{\s*\}|=>|<\/?\w+[^>]*>'
+)), re.IGNORECASE)
+
+_CLARITY_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
+    r'\b(?:therefore|however|moreover|furthermore|consequently)\b',  # Transition words
+    r'\b(?:for example|for instance|such as|including)\b',  # Examples
+    r'\b(?:in other words|that is|specifically)\b',  # Clarifications
+    r'\b(?:first|second|third|finally|next|then)\b'  # Structure words
+)]
+
+# Potential link targets
+_LINKABLE_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
+    r'\b(?:website|site|page|article|blog|post)\b',
+    r'\b(?:company|organization|business|firm)\b',
+    r'\b(?:product|service|solution|offering)\b',
+    r'\b(?:contact|email|phone|address)\b',
+    r'\b(?:learn more|read more|find out|discover)\b'
+)]
+
+# Keyword indicators never overlap one another, so a single alternation scan tallies
+# every category in one pass: group name -> word patterns
+_KEYWORD_GROUPS = {
+    'fact': (
+        r'\b(?:million|billion|thousand|hundred)\b',  # Quantifiers
+        r'\b(?:according to|studies show|research indicates|data shows)\b'  # Fact indicators
+    ),
+    'clarity': tuple(p.pattern for p in _CLARITY_PATTERNS),
+    'linkable': tuple(p.pattern for p in _LINKABLE_PATTERNS),
+}
+_KEYWORD_SCAN_RE = re.compile(
+    '|'.join(
+        '(?P<{}>{})'.format(name, '|'.join(patterns))
+        for name, patterns in _KEYWORD_GROUPS.items()
+    ),
+    re.IGNORECASE
+)
+
+_FACT_SENTENCE_SPLIT_RE = re.compile(r'[.!?]+\s+')
+_SENTENCE_SPLIT_RE = re.compile(r'[.!?]+')
+_ALPHA_RE = re.compile(r'[A-Za-z]')
+
+# Markdown-style format markers
+_HEADING_RE = re.compile(r'^#{1,6}\s+', re.MULTILINE)
+_BULLET_RE = re.compile(r'^\s*[-*+]\s+', re.MULTILINE)
+_NUMBERED_RE = re.compile(r'^\s*\d+\.\s+', re.MULTILINE)
+_BOLD_STAR_RE = re.compile(r'\*\*[^*]+\*\*')
+_BOLD_UNDERSCORE_RE = re.compile(r'__[^_]+__')
+_ITALIC_STAR_RE = re.compile(r'\*[^*]+\*')
+_ITALIC_UNDERSCORE_RE = re.compile(r'_[^_]+_')
+_CODE_RE = re.compile(r'`[^`]+`')
+_MD_LINK_RE = re.compile(r'\[([^\]]+)\]\([^)]+\)')
+
+_UTF8_PARSER = lxml_html.HTMLParser(encoding='utf-8')
+
+
+def _iter_sentences(text: str, boundary_re: re.Pattern):
+    """Yield the stripped, non-empty pieces of text between boundary matches, lazily"""
+    start = 0
+    for match in boundary_re.finditer(text):
+        sentence = text[start:match.start()].strip()
+        if sentence:
+            yield sentence
+        start = match.end()
+    sentence = text[start:].strip()
+    if sentence:
+        yield sentence
+
+
+def _html_to_text(html_content: str) -> str:
+    """Visible page text with scripts, styles, noscript and comments dropped, whitespace collapsed"""
+    if not html_content or not html_content.strip():
+        return ''
+    try:
+        tree = lxml_html.document_fromstring(html_content)
+    except ValueError:
+        # str input with an XML encoding declaration must be handed to lxml as bytes
+        tree = lxml_html.document_fromstring(html_content.encode('utf-8'), parser=_UTF8_PARSER)
+    except etree.ParserError:
+        return ''
+    return _tree_to_text(tree)
+
+
+def _tree_to_text(tree) -> str:
+    """Visible text of a parsed lxml tree; scripts, styles, noscript and comments are stripped from it in place"""
+    etree.strip_elements(tree, etree.Comment, 'script', 'style', 'noscript', with_tail=False)
+    # Text nodes are joined with a space so tag boundaries still separate words
+    return ' '.join(' '.join(tree.itertext()).split())
+
+
+# Identical HTML always gives the same analysis, so repeat pages skip the entity and clarity scans
+_RESULT_CACHE_MAX_ENTRIES = 512
+
 
 class KnowledgeBaseService:
     """Service for analyzing knowledge base and content quality"""
     
     def __init__(self):
-        self.entity_patterns = {
-            'people': r'\b[A-Z][a-z]+ [A-Z][a-z]+\b',  # Simple name pattern
-            'places': r'\b[A-Z][a-z]+(?: [A-Z][a-z]+)*\b',  # Place names
-            'organizations': r'\b[A-Z][a-z]+(?: [A-Z][a-z]+)* (?:Inc|Corp|LLC|Ltd|Company|Organization)\b',
-            'dates': r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}\b',
-            'years': r'\b(?:19|20)\d{2}\b',
-            'percentages': r'\b\d+(?:\.\d+)?%\b',
-            'numbers': r'\b\d+(?:,\d{3})*(?:\.\d+)?\b'
-        }
+        self._result_cache = ResponseCache(max_entries=_RESULT_CACHE_MAX_ENTRIES)
+        self.entity_patterns = _ENTITY_PATTERNS
     
     def _extract_entities(self, text: str) -> Dict[str, List[str]]:
         """Extract entities from text using regex patterns"""
         entities = {}
+        # Skip scans whose pattern cannot match: proper nouns need a capital letter,
+        # the numeric types need a digit
+        has_capitals = _CAPITAL_RE.search(text) is not None
+        has_digits = any(digit in text for digit in _DIGITS)
         
         for entity_type, pattern in self.entity_patterns.items():
-            matches = re.findall(pattern, text, re.IGNORECASE)
+            if entity_type in _PROPER_NOUN_TYPES:
+                runnable = has_capitals
+            elif entity_type in _NUMERIC_ENTITY_TYPES:
+                runnable = has_digits and (entity_type != 'percentages' or '%' in text)
+            else:
+                runnable = True
+            if not runnable:
+                entities[entity_type] = []
+                continue
+            matches = pattern.findall(text)
             entities[entity_type] = list(set(matches))  # Remove duplicates
         
         return entities
     
-    def _calculate_fact_density(self, text: str) -> float:
+    def _scan_keywords(self, text: str) -> Dict[str, int]:
+        """Count fact, clarity and linkable keywords in one pass over the text"""
+        counts = dict.fromkeys(_KEYWORD_GROUPS, 0)
+        for match in _KEYWORD_SCAN_RE.finditer(text):
+            counts[match.lastgroup] += 1
+        return counts
+    
+    def _calculate_fact_density(self, text: str, keyword_counts: Dict[str, int], word_count: int) -> float:
         """Calculate fact density based on numbers, dates, and specific terms"""
-        fact_indicators = [
-            r'\b\d+(?:,\d{3})*(?:\.\d+)?\b',  # Numbers
-            r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}\b',  # Dates
-            r'\b(?:19|20)\d{2}\b',  # Years
-            r'\b\d+(?:\.\d+)?%\b',  # Percentages
-            r'\b(?:million|billion|thousand|hundred)\b',  # Quantifiers
-            r'\b(?:according to|studies show|research indicates|data shows)\b'  # Fact indicators
-        ]
-        
-        total_facts = 0
-        for pattern in fact_indicators:
-            total_facts += len(re.findall(pattern, text, re.IGNORECASE))
+        total_facts = keyword_counts['fact']
+        if any(digit in text for digit in _DIGITS):
+            for pattern, literal in _FACT_NUMERIC_PATTERNS:
+                if literal in text:
+                    total_facts += len(pattern.findall(text))
         
-        word_count = len(text.split())
         return (total_facts / word_count * 100) if word_count > 0 else 0
     
     def _extract_facts(self, text: str) -> List[Dict[str, str]]:
         """Extract candidate factual statements (simple heuristic)."""
-        # Split into sentences crudely
-        sentences = re.split(r'[.!?]+\s+', text)
-        sentences = [s.strip() for s in sentences if s and len(s.strip()) > 0]
-
-        fact_triggers = [
-            r'\b\d+(?:,\d{3})*(?:\.\d+)?\b',
-            r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}\b',
-            r'\b(?:19|20)\d{2}\b',
-            r'\b\d+(?:\.\d+)?%\b',
-            r'\b(?:according to|studies show|research indicates|data shows)\b',
-        ]
-
-        # Terms that suggest JS/analytics/noise to skip
-        noise_patterns = [
-            r'\b(?:window|document|function|var|let|const|gtag|dataLayer|google-analytics|googletag)\b',
-            r'\b(?:jQuery|\$\(|owlCarousel|addEventListener|onclick|script)\b',
-            r'\bmailto:|@\w+\.\w+\b',
-            r'\{\s*\}|=>|<\/?\w+[^>]*>'
-        ]
-
+        # Walk sentences crudely, stopping once 50 facts are collected
         facts: List[Dict[str, str]] = []
-        for s in sentences:
-            trigger_matched = None
-            for pat in fact_triggers:
-                if re.search(pat, s, re.IGNORECASE):
-                    trigger_matched = pat
-                    break
-            if trigger_matched:
+        for s in _iter_sentences(text, _FACT_SENTENCE_SPLIT_RE):
+            if _FACT_TRIGGER_RE.search(s):
                 # Skip if sentence looks like code/JS/noise
-                if any(re.search(pn, s, re.IGNORECASE) for pn in noise_patterns):
+                if _NOISE_RE.search(s):
                     continue
                 # Require some alphabetic content and a reasonable length
-                if not re.search(r'[A-Za-z]', s):
+                # (text is whitespace-collapsed, so spaces + 1 is the word count)
+                if not _ALPHA_RE.search(s):
                     continue
-                if len(s.split()) < 6:
+                if s.count(' ') + 1 < 6:
                     continue
+                # Report the first trigger pattern, in priority order, that matched
+                trigger_matched = next(pat.pattern for pat in _FACT_TRIGGER_PATTERNS if pat.search(s))
                 facts.append({
                     'statement': s[:300],  # cap length
                     'trigger': trigger_matched
                 })
-        return facts[:50]
+                if len(facts) >= 50:
+                    break
+        return facts
     
-    def _assess_clarity(self, text: str) -> Dict[str, float]:
+    def _assess_clarity(self, text: str, keyword_counts: Dict[str, int]) -> Dict[str, float]:
         """Assess content clarity metrics"""
-        sentences = re.split(r'[.!?]+', text)
-        sentences = [s.strip() for s in sentences if s.strip()]
+        # Count sentences and their words in one streaming pass; sentences are stripped
+        # slices of whitespace-collapsed text, so spaces + 1 is the word count
+        sentence_count = 0
+        total_words = 0
+        for sentence in _iter_sentences(text, _SENTENCE_SPLIT_RE):
+            sentence_count += 1
+            total_words += sentence.count(' ') + 1
         
-        if not sentences:
+        if not sentence_count:
             return {'avg_sentence_length': 0, 'clarity_score': 0}
         
         # Calculate average sentence length
-        avg_sentence_length = sum(len(s.split()) for s in sentences) / len(sentences)
+        avg_sentence_length = total_words / sentence_count
         
         # Clarity indicators
-        clarity_indicators = [
-            r'\b(?:therefore|however|moreover|furthermore|consequently)\b',  # Transition words
-            r'\b(?:for example|for instance|such as|including)\b',  # Examples
-            r'\b(?:in other words|that is|specifically)\b',  # Clarifications
-            r'\b(?:first|second|third|finally|next|then)\b'  # Structure words
-        ]
-        
-        clarity_score = 0
-        for pattern in clarity_indicators:
-            clarity_score += len(re.findall(pattern, text, re.IGNORECASE))
+        clarity_score = keyword_counts['clarity']
         
         # Normalize clarity score (0-100)
-        clarity_score = min(100, (clarity_score / len(sentences)) * 20)
+        clarity_score = min(100, (clarity_score / sentence_count) * 20)
         
         return {
             'avg_sentence_length': avg_sentence_length,
             'clarity_score': clarity_score,
-            'sentence_count': len(sentences)
+            'sentence_count': sentence_count
         }
     
-    def _assess_linkability(self, text: str) -> Dict[str, int]:
+    def _assess_linkability(self, keyword_counts: Dict[str, int]) -> Dict[str, int]:
         """Assess content linkability potential"""
-        # Look for potential link targets
-        linkable_terms = [
-            r'\b(?:website|site|page|article|blog|post)\b',
-            r'\b(?:company|organization|business|firm)\b',
-            r'\b(?:product|service|solution|offering)\b',
-            r'\b(?:contact|email|phone|address)\b',
-            r'\b(?:learn more|read more|find out|discover)\b'
-        ]
-        
-        linkability_score = 0
-        for pattern in linkable_terms:
-            linkability_score += len(re.findall(pattern, text, re.IGNORECASE))
+        # Potential link targets
+        linkability_score = keyword_counts['linkable']
         
         return {
             'linkability_score': min(100, linkability_score * 5),
@@ -148,28 +264,60 @@ class KnowledgeBaseService:
     def _analyze_format_usage(self, text: str) -> Dict[str, int]:
         """Analyze usage of different content formats"""
         formats = {
-            'headings': len(re.findall(r'^#{1,6}\s+', text, re.MULTILINE)),
-            'lists': len(re.findall(r'^\s*[-*+]\s+', text, re.MULTILINE)) + len(re.findall(r'^\s*\d+\.\s+', text, re.MULTILINE)),
-            'bold': len(re.findall(r'\*\*[^*]+\*\*', text)) + len(re.findall(r'__[^_]+__', text)),
-            'italic': len(re.findall(r'\*[^*]+\*', text)) + len(re.findall(r'_[^_]+_', text)),
-            'code': len(re.findall(r'`[^`]+`', text)),
-            'links': len(re.findall(r'\[([^\]]+)\]\([^)]+\)', text))
+            'headings': len(_HEADING_RE.findall(text)),
+            'lists': len(_BULLET_RE.findall(text)) + len(_NUMBERED_RE.findall(text)),
+            'bold': len(_BOLD_STAR_RE.findall(text)) + len(_BOLD_UNDERSCORE_RE.findall(text)),
+            'italic': len(_ITALIC_STAR_RE.findall(text)) + len(_ITALIC_UNDERSCORE_RE.findall(text)),
+            'code': len(_CODE_RE.findall(text)),
+            'links': len(_MD_LINK_RE.findall(text))
         }
         
         return formats
     
-    def analyze_knowledge_base(self, url: str, html_content: str) -> Dict:
+    def clear_cache(self) -> None:
+        """Drop all cached analysis results"""
+        self._result_cache.clear()
+    
+    def analyze_knowledge_base(self, url: str, html_content: str, tree=None) -> Dict:
+        """Analyze knowledge base quality and content structure, cached per HTML content hash
+        
+        tree may be an lxml document already parsed from html_content; it is then
+        used instead of reparsing, and has its scripts/styles/comments stripped.
+        """
+        key = ResponseCache.key('knowledge_base', html_content or '')
+        cached = self._result_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        if tree is not None:
+            result = self._analyze_tree(url, tree)
+        else:
+            result = self._analyze_knowledge_base(url, html_content)
+        
+        if 'error' not in result:
+            self._result_cache.set(key, result)
+        return result
+    
+    def _analyze_knowledge_base(self, url: str, html_content: str) -> Dict:
         """Analyze knowledge base quality and content structure"""
         try:
-            # Remove scripts/styles/noscript and comments first
-            cleaned = re.sub(r'<!--.*?-->', ' ', html_content, flags=re.DOTALL)
-            cleaned = re.sub(r'<script[\s\S]*?</script>', ' ', cleaned, flags=re.IGNORECASE)
-            cleaned = re.sub(r'<style[\s\S]*?</style>', ' ', cleaned, flags=re.IGNORECASE)
-            cleaned = re.sub(r'<noscript[\s\S]*?</noscript>', ' ', cleaned, flags=re.IGNORECASE)
-            # Extract text content
-            text_content = re.sub(r'<[^>]+>', ' ', cleaned)
-            text_content = re.sub(r'\s+', ' ', text_content).strip()
-            
+            # Extract text content (scripts/styles/noscript and comments removed)
+            text_content = _html_to_text(html_content)
+        except Exception as e:
+            return self._failed_result(e)
+        return self.analyze_text(url, text_content)
+    
+    def _analyze_tree(self, url: str, tree) -> Dict:
+        """Analyze knowledge base quality of an already parsed page"""
+        try:
+            text_content = _tree_to_text(tree)
+        except Exception as e:
+            return self._failed_result(e)
+        return self.analyze_text(url, text_content)
+    
+    def analyze_text(self, url: str, text_content: str) -> Dict:
+        """Analyze knowledge base quality of visible page text (whitespace collapsed), uncached"""
+        try:
             if not text_content:
                 return {
                     'score': 0,
@@ -185,14 +333,20 @@ class KnowledgeBaseService:
             # Extract entities
             entities = self._extract_entities(text_content)
             
+            # Count fact/clarity/linkable keywords in a single scan
+            keyword_counts = self._scan_keywords(text_content)
+            
+            # Text is whitespace-collapsed, so words are separated by exactly one space
+            word_count = text_content.count(' ') + 1
+            
             # Calculate fact density
-            fact_density = self._calculate_fact_density(text_content)
+            fact_density = self._calculate_fact_density(text_content, keyword_counts, word_count)
             
             # Assess clarity
-            clarity_metrics = self._assess_clarity(text_content)
+            clarity_metrics = self._assess_clarity(text_content, keyword_counts)
             
             # Assess linkability
-            linkability_metrics = self._assess_linkability(text_content)
+            linkability_metrics = self._assess_linkability(keyword_counts)
             
             # Analyze format usage
             format_usage = self._analyze_format_usage(text_content)
@@ -238,13 +392,18 @@ class KnowledgeBaseService:
             }
             
         except Exception as e:
-            return {
-                'score': 0,
-                'error': f'Knowledge base analysis failed: {str(e)}',
-                'entities': {},
-                'fact_density': 0,
-                'clarity': {},
-                'linkability': {},
-                'format_usage': {},
-                'recommendations': ['Retry analysis']
-            }
+            return self._failed_result(e)
+    
+    @staticmethod
+    def _failed_result(e: Exception) -> Dict:
+        """Result returned when the analysis raises"""
+        return {
+            'score': 0,
+            'error': f'Knowledge base analysis failed: {str(e)}',
+            'entities': {},
+            'fact_density': 0,
+            'clarity': {},
+            'linkability': {},
+            'format_usage': {},
+            'recommendations': ['Retry analysis']
+        }
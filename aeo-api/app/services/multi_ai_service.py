@@ -4,52 +4,265 @@ Analyzes content understanding across OpenAI, Gemini, and Claude
 """
 
 import os
-import json
+import re
+import asyncio
 import logging
-from typing import Dict, List, Optional
-from openai import OpenAI
+import threading
+from collections import Counter
+from functools import cached_property
+from json import loads
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import httpx
+from openai import AsyncOpenAI
 import google.generativeai as genai
 import anthropic
+try:
+    from ._response_cache import ResponseCache
+except ImportError:
+    from _response_cache import ResponseCache
+try:
+    from ._rate_limiter import OPENAI_REQUESTS_LIMITER, OPENAI_TOKENS_LIMITER, RateLimiter
+except ImportError:
+    from _rate_limiter import OPENAI_REQUESTS_LIMITER, OPENAI_TOKENS_LIMITER, RateLimiter
+try:
+    from ._ai_prompts import OPENAI_MODEL, UNDERSTANDING_SCORES, UNDERSTANDING_SYSTEM_PROMPT, build_understanding_prompt
+except ImportError:
+    from _ai_prompts import OPENAI_MODEL, UNDERSTANDING_SCORES, UNDERSTANDING_SYSTEM_PROMPT, build_understanding_prompt
+try:
+    # orjson parses the providers' JSON answers several times faster (and accepts str)
+    from orjson import loads as _loads_json
+except ImportError:
+    _loads_json = loads
+try:
+    import h2  # noqa: F401 - enables HTTP/2 on the shared client
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
+# Prompts are capped at MAX_CONTENT_TOKENS tokens of content, so every call is a
+# short classification job: each provider's small, fast tier is enough.
+# OpenAI's model is the one OpenAIService uses (AEO_OPENAI_MODEL)
+_OPENAI_MODEL = OPENAI_MODEL
+_GEMINI_MODEL = 'gemini-2.0-flash-lite'
+_CLAUDE_MODEL = "claude-haiku-4-5-20251001"
+
+_MAX_OUTPUT_TOKENS = 400
+
+# Requests/tokens per minute allowed per provider (defaults: entry-tier API limits);
+# OpenAI's budget is the account-wide one in _rate_limiter, shared with OpenAIService
+_RATE_LIMIT_DEFAULTS = {
+    'gemini': (2000, 4000000),
+    'claude': (50, 30000)
+}
+
+# Pages analyzed at once by analyze_many (each page queries every provider)
+_MAX_CONCURRENT_PAGES = 10
+# SDK-level retries back off exponentially and honor Retry-After on 429s
+_MAX_RETRIES = 5
+
+# Shorter pages are rated without calling any provider
+_MIN_CONTENT_LENGTH = 200
+
+_PROVIDER_LABELS = {'openai': 'OpenAI', 'gemini': 'Gemini', 'claude': 'Claude'}
+
+# Characters that change JSON nesting state
+_JSON_STRUCTURE_RE = re.compile(r'[{}"\\]')
+
+# Query parameters that only track the visit and never change the page
+_TRACKING_PARAMS = frozenset({'ref', 'gclid', 'fbclid', 'msclkid', 'mc_cid', 'mc_eid', '_ga'})
+
+
+def _canonical_url(url: str) -> str:
+    """URL without fragment and tracking parameters, so campaign links share cached answers"""
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+    params = parse_qsl(parts.query, keep_blank_values=True)
+    query = [(k, v) for k, v in params
+             if not k.lower().startswith('utm_') and k.lower() not in _TRACKING_PARAMS]
+    if len(query) == len(params) and not parts.fragment:
+        return url
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ''))
+
+
+def _successful_providers(results: Dict):
+    """(provider, data) for each provider that returned an analysis without error"""
+    for provider in _PROVIDER_LABELS:
+        data = results.get(provider)
+        if data and 'error' not in data:
+            yield provider, data
+
+
+async def _read_json_stream(text_stream) -> Tuple[str, Optional[str]]:
+    """Read streamed text until its first JSON object closes: (text read, the object's text or None)"""
+    text = ''
+    start = -1
+    depth = 0
+    in_string = False
+    escaped_at = -1  # index of the character a backslash escapes
+    async for chunk in text_stream:
+        pos = len(text)
+        text += chunk
+        if start < 0:
+            start = text.find('{', pos)
+            if start < 0:
+                continue
+            depth = 1
+            pos = start + 1
+        # Only braces, quotes and backslashes change state; the regex skips everything else
+        for match in _JSON_STRUCTURE_RE.finditer(text, pos):
+            i = match.start()
+            if i == escaped_at:
+                continue
+            ch = text[i]
+            if in_string:
+                if ch == '\\':
+                    escaped_at = i + 1
+                elif ch == '"':
+                    in_string = False
+            elif ch == '"':
+                in_string = True
+            elif ch == '{':
+                depth += 1
+            elif ch == '}':
+                depth -= 1
+                if depth == 0:
+                    # The rest of the answer is prose/fences the analysis doesn't use
+                    return text[:i + 1], text[start:i + 1]
+    return text, None
+
 
 class MultiAIService:
     """Service for multi-AI provider content analysis"""
     
-    def __init__(self):
-        self.openai_client = None
-        self.gemini_client = None
-        self.claude_client = None
-        
-        # Initialize OpenAI
-        if os.getenv('OPENAI_API_KEY'):
-            try:
-                self.openai_client = OpenAI()
-                logging.info("OpenAI client initialized")
-            except Exception as e:
-                logging.error(f"OpenAI initialization failed: {str(e)}")
-        
-        # Initialize Gemini
-        if os.getenv('GEMINI_API_KEY'):
-            try:
-                print("Initializing Gemini client")
-                genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-                self.gemini_client = genai.GenerativeModel('gemini-2.0-flash-exp')
-                logging.info("Gemini client initialized")
-            except Exception as e:
-                logging.error(f"Gemini initialization failed: {str(e)}")
-        
-        # Initialize Claude
-        if os.getenv('CLAUDE_API_KEY'):
-            try:
-                print("Initializing Claude client")
-                self.claude_client = anthropic.Anthropic(api_key=os.getenv('CLAUDE_API_KEY'))
-                logging.info("Claude client initialized")
-            except Exception as e:
-                logging.error(f"Claude initialization failed: {str(e)}")
+    def __init__(self, min_content_length: int = _MIN_CONTENT_LENGTH):
+        self.min_content_length = min_content_length
+        
+        # The async clients' connection pools are bound to one event loop, so every
+        # provider call runs on this service's own loop thread (started on first use)
+        self._loop = None
+        self._loop_lock = threading.Lock()
+        # Same model + same prompt is answered from memory instead of a paid API call
+        self._response_cache = ResponseCache()
+        # Calls wait client-side instead of being rejected with a 429; override with e.g. OPENAI_RPM / OPENAI_TPM
+        self._rate_limits = {
+            provider: (
+                RateLimiter(int(os.getenv(f'{provider.upper()}_RPM', rpm))),
+                RateLimiter(int(os.getenv(f'{provider.upper()}_TPM', tpm)))
+            )
+            for provider, (rpm, tpm) in _RATE_LIMIT_DEFAULTS.items()
+        }
+        self._rate_limits['openai'] = (OPENAI_REQUESTS_LIMITER, OPENAI_TOKENS_LIMITER)
+        # One keep-alive pool for the OpenAI and Claude SDKs, so repeat calls skip the TCP/TLS handshake
+        self._http = httpx.AsyncClient(
+            http2=_HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            timeout=60.0
+        )
+    
+    # Provider clients are built on first use, so unused providers cost nothing at startup
+    @cached_property
+    def openai_client(self) -> Optional[AsyncOpenAI]:
+        """OpenAI client, or None without OPENAI_API_KEY"""
+        if not os.getenv('OPENAI_API_KEY'):
+            return None
+        try:
+            client = AsyncOpenAI(http_client=self._http, max_retries=_MAX_RETRIES)
+            logging.info("OpenAI client initialized")
+            return client
+        except Exception as e:
+            logging.error(f"OpenAI initialization failed: {str(e)}")
+            return None
+    
+    @cached_property
+    def gemini_client(self) -> Optional[genai.GenerativeModel]:
+        """Gemini model, or None without GEMINI_API_KEY"""
+        if not os.getenv('GEMINI_API_KEY'):
+            return None
+        try:
+            logging.debug("Initializing Gemini client")
+            genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
+            client = genai.GenerativeModel(_GEMINI_MODEL)
+            logging.info("Gemini client initialized")
+            return client
+        except Exception as e:
+            logging.error(f"Gemini initialization failed: {str(e)}")
+            return None
+    
+    @cached_property
+    def claude_client(self) -> Optional[anthropic.AsyncAnthropic]:
+        """Claude client, or None without CLAUDE_API_KEY"""
+        if not os.getenv('CLAUDE_API_KEY'):
+            return None
+        try:
+            logging.debug("Initializing Claude client")
+            client = anthropic.AsyncAnthropic(api_key=os.getenv('CLAUDE_API_KEY'), http_client=self._http, max_retries=_MAX_RETRIES)
+            logging.info("Claude client initialized")
+            return client
+        except Exception as e:
+            logging.error(f"Claude initialization failed: {str(e)}")
+            return None
+    
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Event loop thread that owns the async provider clients"""
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name='multi-ai-loop', daemon=True).start()
+                self._loop = loop
+        return self._loop
     
     def analyze_content_understanding(self, content: str, url: str) -> Dict:
         """
         Analyze content understanding across all available AI providers
+        (blocking wrapper around aanalyze_content_understanding)
+        """
+        future = asyncio.run_coroutine_threadsafe(self._analyze_all(content, url), self._get_loop())
+        return future.result()
+    
+    async def aanalyze_content_understanding(self, content: str, url: str) -> Dict:
+        """
+        Analyze content understanding across all available AI providers
+        """
+        future = asyncio.run_coroutine_threadsafe(self._analyze_all(content, url), self._get_loop())
+        return await asyncio.wrap_future(future)
+    
+    async def analyze_many(self, contents: List[Tuple[str, str]]) -> List[Dict]:
+        """
+        Analyze several pages concurrently, at most _MAX_CONCURRENT_PAGES at a time
+        
+        Args:
+            contents: (content, url) pairs, one per page
+            
+        Returns:
+            Analyses, in the same order as contents
         """
+        future = asyncio.run_coroutine_threadsafe(self._analyze_pages(contents), self._get_loop())
+        return await asyncio.wrap_future(future)
+    
+    async def _analyze_pages(self, contents: List[Tuple[str, str]]) -> List[Dict]:
+        """Fan the pages out over the providers, bounded by a semaphore to stay under rate limits"""
+        semaphore = asyncio.Semaphore(_MAX_CONCURRENT_PAGES)
+        
+        async def analyze(content: str, url: str) -> Dict:
+            async with semaphore:
+                return await self._analyze_all(content, url)
+        
+        return await asyncio.gather(*(analyze(content, url) for content, url in contents))
+    
+    async def aclose(self) -> None:
+        """Close the pooled provider connections"""
+        future = asyncio.run_coroutine_threadsafe(self._http.aclose(), self._get_loop())
+        await asyncio.wrap_future(future)
+    
+    def close(self) -> None:
+        """Close the pooled provider connections (blocking)"""
+        asyncio.run_coroutine_threadsafe(self._http.aclose(), self._get_loop()).result()
+    
+    async def _analyze_all(self, content: str, url: str) -> Dict:
+        """Query every configured provider concurrently and aggregate the answers"""
         results = {
             'openai': None,
             'gemini': None,
@@ -59,83 +272,66 @@ class MultiAIService:
             'overall_score': 0
         }
         
-        # Analyze with OpenAI
-        if self.openai_client:
-            try:
-                results['openai'] = self._analyze_with_openai(content, url)
-            except Exception as e:
-                logging.error(f"OpenAI analysis failed: {str(e)}")
-                results['openai'] = {'error': str(e), 'score': 0}
-        
-        # Analyze with Gemini
-        if self.gemini_client:
-            try:
-                results['gemini'] = self._analyze_with_gemini(content, url)
-            except Exception as e:
-                logging.error(f"Gemini analysis failed: {str(e)}")
-                results['gemini'] = {'error': str(e), 'score': 0}
-        
-        # Analyze with Claude
-        if self.claude_client:
-            try:
-                results['claude'] = self._analyze_with_claude(content, url)
-            except Exception as e:
-                logging.error(f"Claude analysis failed: {str(e)}")
-                results['claude'] = {'error': str(e), 'score': 0}
+        # Total latency is the slowest provider, not the sum of all three
+        tasks = {}
+        # Too little text for a meaningful rating: no provider is asked, every score stays 0
+        if len(content.strip()) >= self.min_content_length:
+            # Truncated and formatted once; every provider gets the same prompt.
+            # /pricing and /pricing?utm_source=x with the same text make the same prompt (and cache key)
+            prompt = build_understanding_prompt(_canonical_url(url), content)
+            
+            if self.openai_client:
+                tasks['openai'] = self._analyze_with_openai(prompt)
+            if self.gemini_client:
+                tasks['gemini'] = self._analyze_with_gemini(prompt)
+            if self.claude_client:
+                tasks['claude'] = self._analyze_with_claude(prompt)
+        
+        outcomes = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        for provider, outcome in zip(tasks, outcomes):
+            if isinstance(outcome, BaseException):
+                logging.error(f"{_PROVIDER_LABELS[provider]} analysis failed: {str(outcome)}")
+                results[provider] = {'error': str(outcome), 'score': 0}
+            else:
+                results[provider] = outcome
         
-        # Compare results and find best provider
-        results['comparison'] = self._compare_providers(results)
-        results['best_provider'] = self._get_best_provider(results)
-        results['overall_score'] = self._calculate_overall_score(results)
+        # Compare results, find best provider and overall score
+        results['comparison'], results['best_provider'], results['overall_score'] = self._aggregate(results)
         
         return results
     
-    def _analyze_with_openai(self, content: str, url: str) -> Dict:
+    async def _throttle(self, provider: str, prompt: str) -> None:
+        """Wait for the provider's request and (estimated) token budgets"""
+        requests_limiter, tokens_limiter = self._rate_limits[provider]
+        await requests_limiter.acquire()
+        # ~4 characters per token, plus the most the answer may use
+        await tokens_limiter.acquire(len(prompt) // 4 + _MAX_OUTPUT_TOKENS)
+    
+    async def _analyze_with_openai(self, prompt: str) -> Dict:
         """Analyze content with OpenAI"""
-        # Truncate content to reduce costs
-        max_content_length = 2000
-        if len(content) > max_content_length:
-            content = content[:max_content_length] + "..."
-        
-        prompt = f"""Analyze this content for AI understanding. URL: {url}
-
-Content: {content}
-
-Rate understanding level (Poor/Fair/Good/Excellent), key topics (top 3), clarity score (0-100), main issues, and recommendations.
-
-JSON format:
-{{
-    "understanding_level": "string",
-    "key_topics": ["topic1", "topic2", "topic3"],
-    "clarity_score": number,
-    "main_issues": ["issue1", "issue2"],
-    "recommendations": ["rec1", "rec2"]
-}}"""
-        
-        response = self.openai_client.chat.completions.create(
-            model="gpt-3.5-turbo",
+        cache_key = ResponseCache.key(_OPENAI_MODEL, UNDERSTANDING_SYSTEM_PROMPT, prompt)
+        cached = self._response_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        await self._throttle('openai', prompt)
+        response = await self.openai_client.chat.completions.create(
+            model=_OPENAI_MODEL,
             messages=[
-                {"role": "system", "content": "AI content analyst. Analyze for understanding. JSON only."},
+                {"role": "system", "content": UNDERSTANDING_SYSTEM_PROMPT},
                 {"role": "user", "content": prompt}
             ],
             response_format={"type": "json_object"},
-            max_tokens=400,
+            max_tokens=_MAX_OUTPUT_TOKENS,
             temperature=0.3
         )
         
-        result = json.loads(response.choices[0].message.content.strip())
+        result = _loads_json(response.choices[0].message.content)
         
         # Calculate score based on understanding level
-        understanding_scores = {
-            'Poor': 20,
-            'Fair': 40,
-            'Good': 70,
-            'Excellent': 90
-        }
-        
-        score = understanding_scores.get(result.get('understanding_level', 'Poor'), 20)
+        score = UNDERSTANDING_SCORES.get(result.get('understanding_level', 'Poor'), 20)
         
-        return {
+        analysis = {
             'provider': 'OpenAI',
             'score': score,
             'understanding_level': result.get('understanding_level', 'Unknown'),
@@ -145,41 +341,33 @@ JSON format:
             'recommendations': result.get('recommendations', []),
             'ai_feedback': response.choices[0].message.content
         }
+        self._response_cache.set(cache_key, analysis)
+        return analysis
     
-    def _analyze_with_gemini(self, content: str, url: str) -> Dict:
+    async def _analyze_with_gemini(self, prompt: str) -> Dict:
         """Analyze content with Gemini"""
-        # Truncate content
-        max_content_length = 2000
-        if len(content) > max_content_length:
-            content = content[:max_content_length] + "..."
-        
-        prompt = f"""Analyze this content for AI understanding. URL: {url}
-
-Content: {content}
-
-Rate understanding level (Poor/Fair/Good/Excellent), key topics (top 3), clarity score (0-100), main issues, and recommendations.
-
-Respond in JSON format:
-{{
-    "understanding_level": "string",
-    "key_topics": ["topic1", "topic2", "topic3"],
-    "clarity_score": number,
-    "main_issues": ["issue1", "issue2"],
-    "recommendations": ["rec1", "rec2"]
-}}"""
+        cache_key = ResponseCache.key(_GEMINI_MODEL, prompt)
+        cached = self._response_cache.get(cache_key)
+        if cached is not None:
+            return cached
         
-        response = self.gemini_client.generate_content(prompt)
+        await self._throttle('gemini', prompt)
+        # Streamed, so the call ends as soon as the JSON object is complete
+        response = await self.gemini_client.generate_content_async(prompt, stream=True)
+        response_text, json_text = await _read_json_stream(chunk.text async for chunk in response)
         
+        parsed = True
         try:
-            # Extract JSON from response
-            response_text = response.text
-            # Find JSON in response
-            start = response_text.find('{')
-            end = response_text.rfind('}') + 1
-            json_text = response_text[start:end]
-            result = json.loads(json_text)
-        except:
+            if json_text is None:
+                # Find JSON in response
+                start = response_text.find('{')
+                end = response_text.rfind('}') + 1
+                json_text = response_text[start:end]
+            result = _loads_json(json_text)
+        except ValueError as e:
+            logging.error(f"Gemini JSON parsing failed: {str(e)}")
             # Fallback parsing
+            parsed = False
             result = {
                 'understanding_level': 'Fair',
                 'key_topics': ['Content Analysis'],
@@ -189,16 +377,9 @@ Respond in JSON format:
             }
         
         # Calculate score
-        understanding_scores = {
-            'Poor': 20,
-            'Fair': 40,
-            'Good': 70,
-            'Excellent': 90
-        }
-        
-        score = understanding_scores.get(result.get('understanding_level', 'Fair'), 40)
+        score = UNDERSTANDING_SCORES.get(result.get('understanding_level', 'Fair'), 40)
         
-        return {
+        analysis = {
             'provider': 'Gemini',
             'score': score,
             'understanding_level': result.get('understanding_level', 'Unknown'),
@@ -206,69 +387,62 @@ Respond in JSON format:
             'clarity_score': result.get('clarity_score', 0),
             'main_issues': result.get('main_issues', []),
             'recommendations': result.get('recommendations', []),
-            'ai_feedback': response.text
+            'ai_feedback': response_text
         }
+        # Unparseable answers are not cached, so the next request asks again
+        if parsed:
+            self._response_cache.set(cache_key, analysis)
+        return analysis
     
-    def _analyze_with_claude(self, content: str, url: str) -> Dict:
+    async def _analyze_with_claude(self, prompt: str) -> Dict:
         """Analyze content with Claude"""
-        # Truncate content
-        max_content_length = 2000
-        if len(content) > max_content_length:
-            content = content[:max_content_length] + "..."
-        
-        prompt = f"""Analyze this content for AI understanding. URL: {url}
-
-Content: {content}
-
-Rate understanding level (Poor/Fair/Good/Excellent), key topics (top 3), clarity score (0-100), main issues, and recommendations.
-
-Respond in JSON format:
-{{
-    "understanding_level": "string",
-    "key_topics": ["topic1", "topic2", "topic3"],
-    "clarity_score": number,
-    "main_issues": ["issue1", "issue2"],
-    "recommendations": ["rec1", "rec2"]
-}}"""
-        
-        response = self.claude_client.messages.create(
-            model="claude-sonnet-4-5-20250929",
-            max_tokens=400,
+        cache_key = ResponseCache.key(_CLAUDE_MODEL, prompt)
+        cached = self._response_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        await self._throttle('claude', prompt)
+        # Streamed, so the call ends as soon as the JSON object is complete
+        async with self.claude_client.messages.stream(
+            model=_CLAUDE_MODEL,
+            max_tokens=_MAX_OUTPUT_TOKENS,
             temperature=0.3,
             messages=[
                 {"role": "user", "content": prompt}
             ]
-        )
+        ) as stream:
+            response_text, json_text = await _read_json_stream(stream.text_stream)
         
+        parsed = True
         try:
-            response_text = response.content[0].text
-            
-            # Extract JSON from markdown code blocks if present
-            if '```json' in response_text:
-                start = response_text.find('```json') + 7
-                end = response_text.find('```', start)
-                json_text = response_text[start:end].strip()
-            elif '```' in response_text:
-                # Handle generic code blocks
-                start = response_text.find('```') + 3
-                end = response_text.find('```', start)
-                json_text = response_text[start:end].strip()
-                # Remove 'json' prefix if present
-                if json_text.lower().startswith('json'):
-                    json_text = json_text[4:].strip()
-            else:
-                # Try to find JSON object directly
-                json_start = response_text.find('{')
-                json_end = response_text.rfind('}') + 1
-                if json_start >= 0 and json_end > json_start:
-                    json_text = response_text[json_start:json_end]
+            if json_text is None:
+                # Extract JSON from markdown code blocks if present
+                if '```json' in response_text:
+                    start = response_text.find('```json') + 7
+                    end = response_text.find('```', start)
+                    json_text = response_text[start:end].strip()
+                elif '```' in response_text:
+                    # Handle generic code blocks
+                    start = response_text.find('```') + 3
+                    end = response_text.find('```', start)
+                    json_text = response_text[start:end].strip()
+                    # Remove 'json' prefix if present
+                    if json_text.lower().startswith('json'):
+                        json_text = json_text[4:].strip()
                 else:
-                    json_text = response_text
+                    # Try to find JSON object directly
+                    json_start = response_text.find('{')
+                    json_end = response_text.rfind('}') + 1
+                    if json_start >= 0 and json_end > json_start:
+                        json_text = response_text[json_start:json_end]
+                    else:
+                        json_text = response_text
             
-            result = json.loads(json_text)
-        except Exception as e:
+            result = _loads_json(json_text)
+        except ValueError as e:
             logging.error(f"Claude JSON parsing failed: {str(e)}")
             # Fallback parsing
+            parsed = False
             result = {
                 'understanding_level': 'Fair',
                 'key_topics': ['Content Analysis'],
@@ -278,16 +452,9 @@ Respond in JSON format:
             }
         
         # Calculate score
-        understanding_scores = {
-            'Poor': 20,
-            'Fair': 40,
-            'Good': 70,
-            'Excellent': 90
-        }
-        
-        score = understanding_scores.get(result.get('understanding_level', 'Fair'), 40)
+        score = UNDERSTANDING_SCORES.get(result.get('understanding_level', 'Fair'), 40)
         
-        return {
+        analysis = {
             'provider': 'Claude',
             'score': score,
             'understanding_level': result.get('understanding_level', 'Unknown'),
@@ -295,11 +462,14 @@ Respond in JSON format:
             'clarity_score': result.get('clarity_score', 0),
             'main_issues': result.get('main_issues', []),
             'recommendations': result.get('recommendations', []),
-            'ai_feedback': response.content[0].text
+            'ai_feedback': response_text
         }
+        if parsed:
+            self._response_cache.set(cache_key, analysis)
+        return analysis
     
-    def _compare_providers(self, results: Dict) -> Dict:
-        """Compare results across providers"""
+    def _aggregate(self, results: Dict) -> Tuple[Dict, str, int]:
+        """Compare providers, pick the best one and average their scores in one pass"""
         comparison = {
             'scores': {},
             'understanding_levels': {},
@@ -308,59 +478,35 @@ Respond in JSON format:
             'recommendations_summary': []
         }
         
-        for provider, data in results.items():
-            if provider in ['openai', 'gemini', 'claude'] and data and 'error' not in data:
-                comparison['scores'][provider] = data.get('score', 0)
-                comparison['understanding_levels'][provider] = data.get('understanding_level', 'Unknown')
-                comparison['clarity_scores'][provider] = data.get('clarity_score', 0)
-        
-        # Find topic overlap
-        all_topics = []
-        for provider, data in results.items():
-            if provider in ['openai', 'gemini', 'claude'] and data and 'error' not in data:
-                all_topics.extend(data.get('key_topics', []))
-        
-        # Count topic frequency
-        topic_counts = {}
-        for topic in all_topics:
-            topic_counts[topic] = topic_counts.get(topic, 0) + 1
+        topic_counts = Counter()
+        all_recommendations = []
+        best_provider = None
+        best_score = 0
+        score_sum = 0
+        for provider, data in _successful_providers(results):
+            score = data.get('score', 0)
+            comparison['scores'][provider] = score
+            comparison['understanding_levels'][provider] = data.get('understanding_level', 'Unknown')
+            comparison['clarity_scores'][provider] = data.get('clarity_score', 0)
+            topic_counts.update(data.get('key_topics', []))
+            all_recommendations.extend(data.get('recommendations', []))
+            
+            # Best provider gave the highest understanding score
+            if score > best_score:
+                best_score = score
+                best_provider = provider
+            score_sum += score
         
+        # Topics named by more than one provider
         comparison['topics_overlap'] = {
             topic: count for topic, count in topic_counts.items() if count > 1
         }
         
-        # Aggregate recommendations
-        all_recommendations = []
-        for provider, data in results.items():
-            if provider in ['openai', 'gemini', 'claude'] and data and 'error' not in data:
-                all_recommendations.extend(data.get('recommendations', []))
-        
-        # Remove duplicates and keep unique recommendations
-        comparison['recommendations_summary'] = list(set(all_recommendations))
+        # Remove duplicates, keeping first-seen order
+        comparison['recommendations_summary'] = list(dict.fromkeys(all_recommendations))
         
-        return comparison
-    
-    def _get_best_provider(self, results: Dict) -> str:
-        """Determine which provider gave the best understanding"""
-        best_provider = None
-        best_score = 0
-        
-        for provider, data in results.items():
-            if provider in ['openai', 'gemini', 'claude'] and data and 'error' not in data:
-                score = data.get('score', 0)
-                if score > best_score:
-                    best_score = score
-                    best_provider = provider
-        
-        return best_provider or 'none'
-    
-    def _calculate_overall_score(self, results: Dict) -> int:
-        """Calculate overall AI understanding score"""
-        scores = []
-        for provider, data in results.items():
-            if provider in ['openai', 'gemini', 'claude'] and data and 'error' not in data:
-                scores.append(data.get('score', 0))
+        # Overall score is the average over the providers that answered
+        provider_count = len(comparison['scores'])
+        overall_score = score_sum // provider_count if provider_count else 0
         
-        if scores:
-            return sum(scores) // len(scores)  # Average score
-        return 0
+        return comparison, best_provider or 'none', overall_score
@@ -5,24 +5,412 @@ Provides AI-powered content analysis and understanding
 
 import os
 import re
-from typing import Dict, List, Optional
-from openai import OpenAI
+from json import dumps, loads
+import asyncio
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+import httpx
+from openai import AsyncOpenAI, OpenAI
 import logging
+try:
+    from ._ai_prompts import (
+        MAX_CONTENT_TOKENS, OPENAI_MODEL, SENTIMENT_SCORES, TONE_SCORES, UNDERSTANDING_SCORES, UNDERSTANDING_SYSTEM_PROMPT,
+        build_understanding_prompt, count_tokens, truncate_content
+    )
+    from ._rate_limiter import OPENAI_REQUESTS_LIMITER, OPENAI_TOKENS_LIMITER, RateLimiter
+    from ._response_cache import ResponseCache
+    from ._semantic_cache import SemanticCache
+except ImportError:
+    from _ai_prompts import (
+        MAX_CONTENT_TOKENS, OPENAI_MODEL, SENTIMENT_SCORES, TONE_SCORES, UNDERSTANDING_SCORES, UNDERSTANDING_SYSTEM_PROMPT,
+        build_understanding_prompt, count_tokens, truncate_content
+    )
+    from _rate_limiter import OPENAI_REQUESTS_LIMITER, OPENAI_TOKENS_LIMITER, RateLimiter
+    from _response_cache import ResponseCache
+    from _semantic_cache import SemanticCache
+
+try:
+    # orjson parses the JSON answers several times faster (and accepts str)
+    from orjson import loads as _loads_json
+except ImportError:
+    _loads_json = loads
+
+try:
+    import h2  # noqa: F401 - enables HTTP/2 on the pooled clients
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
+# Optional: keeps cached responses across restarts when OPENAI_CACHE_DIR is set
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
+# Shared with the tokenizer, so token budgets are counted for the model actually used
+_MODEL = OPENAI_MODEL
+# Model families that accept a strict json_schema response_format (Structured Outputs),
+# less the snapshots that predate it; anything else, e.g. gpt-3.5-turbo, gets plain JSON
+# mode with the expected keys spelled out in the prompt
+_STRUCTURED_OUTPUT_MODELS = ('gpt-4o', 'gpt-4.1', 'gpt-5', 'o3', 'o4')
+_NO_STRUCTURED_OUTPUT_SNAPSHOTS = frozenset({'gpt-4o-2024-05-13'})
+
+
+def _supports_structured_outputs(model: str) -> bool:
+    """Whether model accepts a strict json_schema response_format"""
+    return model.startswith(_STRUCTURED_OUTPUT_MODELS) and model not in _NO_STRUCTURED_OUTPUT_SNAPSHOTS
+
+
+_STRUCTURED_OUTPUTS = _supports_structured_outputs(_MODEL)
+
+# Analyses analyze_all can answer in a single request
+_ANALYSES = ('understanding', 'tone', 'answerability', 'summary')
+
+# Tokens of content each analysis reads, and answer tokens it may use. JSON answers
+# get ample room (a cut-off object can't be parsed; only generated tokens are billed),
+# while the summary cap enforces its length
+_CONTENT_LIMITS = {'understanding': MAX_CONTENT_TOKENS, 'tone': 375, 'answerability': 375, 'summary': 250}
+_MAX_TOKENS = {'understanding': 800, 'tone': 800, 'answerability': 800, 'summary': 200}
+_MIN_SUMMARY_TOKENS = 50
+
+_DEFAULT_QUESTIONS = [
+    "What is the main topic?",
+    "What problem does this solve?",
+    "What are the key benefits?",
+    "What action should be taken?"
+]
+
+# In-flight requests allowed by analyze_batch
+_MAX_CONCURRENT_REQUESTS = 20
+# Keep-alive pool settings for the SDK's HTTP clients, so repeat calls skip the TCP/TLS handshake
+_HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+_HTTP_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+# SDK-level retries on 408/429/5xx and connection errors back off exponentially
+# with jitter and honor Retry-After, so a transient error costs seconds, not the analysis
+_MAX_RETRIES = 5
+
+# Answered analyses are reused for repeat content within this many seconds
+_CACHE_TTL = 24 * 60 * 60
+_CACHE_MAX_ENTRIES = 512
+
+# AEO_SEMANTIC_CACHE=1 also reuses analyses of near-identical content, matched by embedding
+_EMBEDDING_MODEL = "text-embedding-3-small"
+_EMBEDDING_INPUT_LENGTH = 2000
+
+# Single-analysis prompts, built once; only the content (and questions) vary per call
+_TONE_SYSTEM_PROMPT = "Tone and sentiment analyst. JSON only."
+_TONE_PROMPT_PREFIX = "Analyze tone and sentiment: "
+_TONE_PROMPT_SUFFIX = "\n\nProvide tone, sentiment, confidence (0-100), emotional indicators, and recommendations."
+_ANSWERABILITY_SYSTEM_PROMPT = "Answerability analyst. JSON only."
+_ANSWERABILITY_PROMPT_PREFIX = "Analyze answerability: "
+_ANSWERABILITY_QUESTIONS_LABEL = "\n\nQuestions: "
+_ANSWERABILITY_PROMPT_SUFFIX = (
+    "\n\nRate how well content answers questions (0-100), what's answered clearly, "
+    "what's unclear, and recommendations."
+)
+_SUMMARY_SYSTEM_PROMPT = "Concise summarizer."
+
+_COMBINED_SYSTEM_PROMPT = "Content analyst. Answer every requested section. JSON only."
+_COMBINED_SECTIONS = {
+    'understanding': (
+        '"understanding": understanding level, key topics (top 3), clarity score (0-100), '
+        'main issues, and recommendations'
+    ),
+    'tone': '"tone": tone, sentiment, confidence (0-100), emotional indicators, and recommendations',
+    'answerability': (
+        '"answerability": how well content answers the questions (0-100), what\'s answered clearly, '
+        'what\'s unclear, and recommendations'
+    ),
+    'summary': '"summary": a summary in {max_length} chars',
+}
+
+# Structured Outputs: the model's answer always matches these (strict mode needs every
+# property required and no extra properties); the prompts carry only the instructions
+_STRING_LIST_SCHEMA = {"type": "array", "items": {"type": "string"}}
+_ANALYSIS_SCHEMAS = {
+    'understanding': {
+        "type": "object",
+        "properties": {
+            "understanding_level": {"type": "string", "enum": list(UNDERSTANDING_SCORES)},
+            "key_topics": _STRING_LIST_SCHEMA,
+            "clarity_score": {"type": "integer"},
+            "main_issues": _STRING_LIST_SCHEMA,
+            "recommendations": _STRING_LIST_SCHEMA
+        },
+        "required": ["understanding_level", "key_topics", "clarity_score", "main_issues", "recommendations"],
+        "additionalProperties": False
+    },
+    'tone': {
+        "type": "object",
+        "properties": {
+            "tone": {"type": "string", "enum": list(TONE_SCORES)},
+            "sentiment": {"type": "string", "enum": list(SENTIMENT_SCORES)},
+            "confidence": {"type": "integer"},
+            "emotional_indicators": _STRING_LIST_SCHEMA,
+            "recommendations": _STRING_LIST_SCHEMA
+        },
+        "required": ["tone", "sentiment", "confidence", "emotional_indicators", "recommendations"],
+        "additionalProperties": False
+    },
+    'answerability': {
+        "type": "object",
+        "properties": {
+            "ai_answerability_score": {"type": "integer"},
+            "answered_questions": _STRING_LIST_SCHEMA,
+            "unanswered_questions": _STRING_LIST_SCHEMA,
+            "clarity_issues": _STRING_LIST_SCHEMA,
+            "recommendations": _STRING_LIST_SCHEMA
+        },
+        "required": ["ai_answerability_score", "answered_questions", "unanswered_questions",
+                     "clarity_issues", "recommendations"],
+        "additionalProperties": False
+    },
+    'summary': {"type": "string"},
+}
+
+# Pages this short, or short error/interstitial pages, get a canned result without a request
+_MIN_CONTENT_LENGTH = 50
+_BOILERPLATE_MAX_LENGTH = 300
+_BOILERPLATE_RE = re.compile(
+    r'\b(?:404 (?:error|not found)|error 404|page not found|access denied|enable javascript|just a moment'
+    r'|checking your browser|we use cookies|accept (?:all )?cookies)\b',
+    re.IGNORECASE
+)
+_TRIVIAL_CONTENT_ISSUE = 'Page has too little content to analyze'
+
+# Running totals across every OpenAIService, for capacity planning (see usage_totals())
+_USAGE = Counter()
+_USAGE_LOCK = threading.Lock()
+
+_FAILURE_LOG_LABELS = {
+    'understanding': 'content understanding analysis',
+    'tone': 'tone analysis',
+    'answerability': 'answerability analysis',
+    'summary': 'summarization',
+}
+
+
+@lru_cache(maxsize=32)
+def _response_format(analyses: Tuple[str, ...]) -> Dict:
+    """Structured Outputs response_format for a request answering analyses (JSON mode without them)"""
+    if not _STRUCTURED_OUTPUTS:
+        return {"type": "json_object"}
+    if len(analyses) == 1:
+        name, schema = analyses[0], _ANALYSIS_SCHEMAS[analyses[0]]
+    else:
+        name = "_".join(analyses)
+        schema = {
+            "type": "object",
+            "properties": {analysis: _ANALYSIS_SCHEMAS[analysis] for analysis in analyses},
+            "required": list(analyses),
+            "additionalProperties": False
+        }
+    return {"type": "json_schema", "json_schema": {"name": name, "schema": schema, "strict": True}}
+
+
+def _json_shape(schema: Dict):
+    """Example value of a JSON schema, showing the model each key and its type"""
+    if schema["type"] == "object":
+        return {key: _json_shape(value) for key, value in schema["properties"].items()}
+    if schema["type"] == "array":
+        return [_json_shape(schema["items"])]
+    if "enum" in schema:
+        return "|".join(schema["enum"])
+    return 0 if schema["type"] == "integer" else "string"
+
+
+@lru_cache(maxsize=32)
+def _json_mode_instructions(analyses: Tuple[str, ...]) -> str:
+    """Prompt text giving the expected JSON keys, for models without Structured Outputs"""
+    # build_understanding_prompt already spells out its keys
+    if _STRUCTURED_OUTPUTS or analyses == ('understanding',):
+        return ""
+    if len(analyses) == 1:
+        shape = _json_shape(_ANALYSIS_SCHEMAS[analyses[0]])
+    else:
+        shape = {analysis: _json_shape(_ANALYSIS_SCHEMAS[analysis]) for analysis in analyses}
+    return "\n\nRespond in JSON format:\n" + dumps(shape)
+
+
+@lru_cache(maxsize=1)
+def _shared_client() -> OpenAI:
+    """Sync client shared by every OpenAIService, so they reuse one keep-alive connection pool"""
+    http_client = httpx.Client(http2=_HTTP2_AVAILABLE, limits=_HTTP_LIMITS, timeout=_HTTP_TIMEOUT)
+    return OpenAI(http_client=http_client, max_retries=_MAX_RETRIES)
+
+
+def _understanding_result(result: Dict, feedback: str) -> Dict:
+    """Understanding analysis built from the model's answer"""
+    # Calculate score based on understanding level
+    score = UNDERSTANDING_SCORES.get(result.get('understanding_level', 'Poor'), 20)
+
+    return {
+        'score': score,
+        'understanding_level': result.get('understanding_level', 'Unknown'),
+        'key_topics': result.get('key_topics', []),
+        'clarity_score': result.get('clarity_score', 0),
+        'main_issues': result.get('main_issues', []),
+        'recommendations': result.get('recommendations', []),
+        'ai_feedback': feedback
+    }
+
+
+def _tone_result(result: Dict, feedback: str) -> Dict:
+    """Tone and sentiment analysis built from the model's answer"""
+    # Calculate score based on sentiment and tone appropriateness
+    sentiment_score = SENTIMENT_SCORES.get(result.get('sentiment', 'Neutral'), 60)
+    tone_score = TONE_SCORES.get(result.get('tone', 'Casual'), 50)
+
+    return {
+        'score': (sentiment_score + tone_score) // 2,
+        'tone': result.get('tone', 'Unknown'),
+        'sentiment': result.get('sentiment', 'Neutral'),
+        'confidence': result.get('confidence', 0),
+        'emotional_indicators': result.get('emotional_indicators', []),
+        'recommendations': result.get('recommendations', []),
+        'ai_feedback': feedback
+    }
+
+
+def _answerability_result(result: Dict, feedback: str) -> Dict:
+    """Answerability analysis built from the model's answer"""
+    return {
+        'score': result.get('ai_answerability_score', 0),
+        'ai_answerability_score': result.get('ai_answerability_score', 0),
+        'answered_questions': result.get('answered_questions', []),
+        'unanswered_questions': result.get('unanswered_questions', []),
+        'clarity_issues': result.get('clarity_issues', []),
+        'recommendations': result.get('recommendations', []),
+        'gpt_feedback': feedback
+    }
+
+
+_RESULT_BUILDERS = {
+    'understanding': _understanding_result,
+    'tone': _tone_result,
+    'answerability': _answerability_result,
+}
+
+
+def _unavailable_result(analysis: str):
+    """Result returned for analysis when no OpenAI client is configured"""
+    if analysis == 'summary':
+        return "OpenAI service not available for summarization"
+    result = {'score': 0, 'error': 'OpenAI service not available'}
+    if analysis == 'understanding':
+        result.update(understanding_level='unknown', key_topics=[], clarity_score=0)
+    elif analysis == 'tone':
+        result.update(tone='unknown', sentiment='neutral')
+    else:
+        result.update(ai_answerability_score=0, gpt_feedback='Service not available')
+    result['recommendations'] = ['Configure OpenAI API key']
+    return result
+
+
+def _failed_result(analysis: str, e: Exception):
+    """Result returned for analysis when the OpenAI request fails"""
+    if analysis == 'summary':
+        return f"Summarization failed: {str(e)}"
+    if analysis == 'understanding':
+        result = {'score': 0, 'error': f'Analysis failed: {str(e)}',
+                  'understanding_level': 'unknown', 'key_topics': [], 'clarity_score': 0}
+    elif analysis == 'tone':
+        result = {'score': 0, 'error': f'Tone analysis failed: {str(e)}',
+                  'tone': 'unknown', 'sentiment': 'neutral'}
+    else:
+        result = {'score': 0, 'error': f'Answerability analysis failed: {str(e)}',
+                  'ai_answerability_score': 0, 'gpt_feedback': 'Analysis failed'}
+    result['recommendations'] = ['Retry analysis or check API configuration']
+    return result
+
+
+def _record_usage(analyses: Sequence[str], status: str, usage=None) -> None:
+    """Add a request's outcome and token usage to the running totals"""
+    prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+    completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+    with _USAGE_LOCK:
+        _USAGE[f'requests_{status}'] += 1
+        _USAGE['prompt_tokens'] += prompt_tokens
+        _USAGE['completion_tokens'] += completion_tokens
+    if usage is not None:
+        logging.info(f"openai_usage analyses={'+'.join(analyses)} model={_MODEL} "
+                     f"prompt={prompt_tokens} completion={completion_tokens}")
+
+
+def usage_totals() -> Dict[str, int]:
+    """OpenAI requests (ok/failed) and tokens used by every OpenAIService since startup"""
+    with _USAGE_LOCK:
+        return dict(_USAGE)
+
+
+def _is_trivial(content: str) -> bool:
+    """Whether content is too thin (or only an error/interstitial page) to be worth a request"""
+    content = content.strip()
+    if len(content) < _MIN_CONTENT_LENGTH:
+        return True
+    return len(content) <= _BOILERPLATE_MAX_LENGTH and _BOILERPLATE_RE.search(content) is not None
+
+
+def _trivial_result(analysis: str, content: str):
+    """Canned result for analysis of trivial content"""
+    if analysis == 'summary':
+        return content.strip()
+    recommendations = ['Add substantive text content to the page']
+    if analysis == 'understanding':
+        return {'score': UNDERSTANDING_SCORES['Poor'], 'understanding_level': 'Poor', 'key_topics': [],
+                'clarity_score': 0, 'main_issues': [_TRIVIAL_CONTENT_ISSUE], 'recommendations': recommendations}
+    if analysis == 'tone':
+        return {'score': 0, 'tone': 'unknown', 'sentiment': 'neutral', 'confidence': 0,
+                'emotional_indicators': [], 'recommendations': recommendations}
+    return {'score': 0, 'ai_answerability_score': 0, 'answered_questions': [], 'unanswered_questions': [],
+            'clarity_issues': [_TRIVIAL_CONTENT_ISSUE], 'recommendations': recommendations,
+            'gpt_feedback': _TRIVIAL_CONTENT_ISSUE}
+
 
 class OpenAIService:
     """Service for OpenAI-powered content analysis"""
     
-    def __init__(self):
+    def __init__(self, requests_per_minute: Optional[int] = None, tokens_per_minute: Optional[int] = None):
         self.client = None
+        # The async client stays per instance: its pool is bound to this instance's event loop
+        self.aclient = None
         self.api_key = os.getenv('OPENAI_API_KEY')
+        # Same content analyzed again is answered from memory instead of a paid API call
+        self._response_cache = ResponseCache(ttl=_CACHE_TTL, max_entries=_CACHE_MAX_ENTRIES)
+        self._disk_cache = None
+        cache_dir = os.getenv('OPENAI_CACHE_DIR')
+        if cache_dir and diskcache is not None:
+            self._disk_cache = diskcache.Cache(cache_dir)
+        self._semantic_cache = None
+        self._embedding_cache = None
+        if os.getenv('AEO_SEMANTIC_CACHE') == '1':
+            self._semantic_cache = SemanticCache(max_entries=_CACHE_MAX_ENTRIES)
+            self._embedding_cache = ResponseCache(ttl=_CACHE_TTL, max_entries=_CACHE_MAX_ENTRIES)
+        # Calls wait client-side instead of being rejected with a 429. The account-wide
+        # OPENAI_RPM / OPENAI_TPM buckets are shared with every other OpenAI caller;
+        # explicit limits give this instance buckets of its own
+        self._requests_limiter = RateLimiter(requests_per_minute) if requests_per_minute else OPENAI_REQUESTS_LIMITER
+        self._tokens_limiter = RateLimiter(tokens_per_minute) if tokens_per_minute else OPENAI_TOKENS_LIMITER
+        # The async client's connection pool is bound to one event loop, so async
+        # requests run on this service's own loop thread (started on first use)
+        self._loop = None
+        self._loop_lock = threading.Lock()
         
         if self.api_key:
             try:
-                self.client = OpenAI()
+                self.client = _shared_client()
+                self.aclient = AsyncOpenAI(
+                    http_client=httpx.AsyncClient(http2=_HTTP2_AVAILABLE, limits=_HTTP_LIMITS, timeout=_HTTP_TIMEOUT),
+                    max_retries=_MAX_RETRIES
+                )
                 logging.info("OpenAI client initialized successfully")
             except Exception as e:
                 logging.error(f"Failed to initialize OpenAI client: {str(e)}")
                 self.client = None
+                self.aclient = None
         else:
             logging.warning("OPENAI_API_KEY not found in environment variables")
     
@@ -30,280 +418,387 @@ class OpenAIService:
         """Check if OpenAI service is available"""
         return self.client is not None
     
-    def analyze_content_understanding(self, content: str, url: str) -> Dict:
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Event loop thread that owns the async client"""
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name='openai-loop', daemon=True).start()
+                self._loop = loop
+        return self._loop
+    
+    def analyze_all(self, content: str, url: str = '', questions: Optional[List[str]] = None,
+                    analyses: Sequence[str] = _ANALYSES, max_length: int = 200) -> Dict:
         """
-        Analyze if AI can understand the content clearly
+        Run the requested analyses in one OpenAI request; results keyed by analysis name
         """
-        if not self._is_available():
-            return {
-                'score': 0,
-                'error': 'OpenAI service not available',
-                'understanding_level': 'unknown',
-                'key_topics': [],
-                'clarity_score': 0,
-                'recommendations': ['Configure OpenAI API key']
-            }
+        if _is_trivial(content):
+            return {analysis: _trivial_result(analysis, content) for analysis in analyses}
+        questions = questions or _DEFAULT_QUESTIONS
+        results, pending = self._cached(analyses, content, url, questions, max_length)
+        embedding = None
+        if pending and self._semantic_cache is not None and self._is_available():
+            embedding = self._embed(content)
+            pending = self._similar_cached(results, pending, embedding, url, questions, max_length)
         
-        try:
-            # Truncate content to reduce costs - much shorter limit
-            max_content_length = 2000  # Reduced from 8000 to minimize tokens
-            if len(content) > max_content_length:
-                content = content[:max_content_length] + "..."
-            
-            # Shorter, more focused prompt to reduce costs
-            prompt = f"""Analyze this content for AI understanding. URL: {url}
-
-Content: {content}
-
-Rate understanding level (Poor/Fair/Good/Excellent), key topics (top 3), clarity score (0-100), main issues, and recommendations.
-
-JSON format:
-{{
-    "understanding_level": "string",
-    "key_topics": ["topic1", "topic2", "topic3"],
-    "clarity_score": number,
-    "main_issues": ["issue1", "issue2"],
-    "recommendations": ["rec1", "rec2"]
-}}"""
-            
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",  # Use cheaper model instead of 1106
-                messages=[
-                    {"role": "system", "content": "AI content analyst. Analyze for understanding. JSON only."},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={"type": "json_object"},
-                max_tokens=400,  # Reduced from 1000 to minimize costs
-                temperature=0.3
-            )
-            
-            # Parse JSON response
-            import json
-            response_content = response.choices[0].message.content.strip()
-            
-            # Log the raw response for debugging
-            logging.debug(f"OpenAI response: {response_content[:200]}...")
-            
-            result = json.loads(response_content)
-            
-            # Calculate score based on understanding level
-            understanding_scores = {
-                'Poor': 20,
-                'Fair': 40,
-                'Good': 70,
-                'Excellent': 90
-            }
-            
-            score = understanding_scores.get(result.get('understanding_level', 'Poor'), 20)
-            
-            return {
-                'score': score,
-                'understanding_level': result.get('understanding_level', 'Unknown'),
-                'key_topics': result.get('key_topics', []),
-                'clarity_score': result.get('clarity_score', 0),
-                'main_issues': result.get('main_issues', []),
-                'recommendations': result.get('recommendations', []),
-                'ai_feedback': response.choices[0].message.content
-            }
+        if pending and not self._is_available():
+            results.update((analysis, _unavailable_result(analysis)) for analysis in pending)
+        elif pending:
+            try:
+                request = self._build_request(pending, content, url, questions, max_length)
+                self._throttle(self._request_tokens(request))
+                response = self.client.chat.completions.create(**request)
+                _record_usage(pending, 'ok', response.usage)
+                answered = self._parse_response(pending, response.choices[0].message.content)
+            except Exception as e:
+                answered = self._failed_results(pending, e)
+            else:
+                self._store(answered, content, url, questions, max_length, embedding)
+            results.update(answered)
+        
+        return {analysis: results[analysis] for analysis in analyses}
+    
+    async def aanalyze_all(self, content: str, url: str = '', questions: Optional[List[str]] = None,
+                           analyses: Sequence[str] = _ANALYSES, max_length: int = 200) -> Dict:
+        """
+        Run the requested analyses in one OpenAI request without blocking the caller's event loop
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self._aanalyze_all(content, url, questions, analyses, max_length), self._get_loop()
+        )
+        return await asyncio.wrap_future(future)
+    
+    async def analyze_batch(self, contents: List[Tuple[str, str]], questions: Optional[List[str]] = None,
+                            analyses: Sequence[str] = _ANALYSES) -> List[Dict]:
+        """
+        Analyze several pages concurrently, at most _MAX_CONCURRENT_REQUESTS at a time
+        
+        Args:
+            contents: (content, url) pairs, one per page
+            questions: Questions for the answerability analysis of every page
+            analyses: Analyses to run for each page
             
-        except Exception as e:
-            logging.error(f"OpenAI content understanding analysis failed: {str(e)}")
-            return {
-                'score': 0,
-                'error': f'Analysis failed: {str(e)}',
-                'understanding_level': 'unknown',
-                'key_topics': [],
-                'clarity_score': 0,
-                'recommendations': ['Retry analysis or check API configuration']
-            }
+        Returns:
+            analyze_all results, in the same order as contents
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self._analyze_batch(contents, questions, analyses), self._get_loop()
+        )
+        return await asyncio.wrap_future(future)
+    
+    async def _analyze_batch(self, contents: List[Tuple[str, str]], questions: Optional[List[str]],
+                             analyses: Sequence[str]) -> List[Dict]:
+        """Fan the pages out, bounded by a semaphore to stay under the rate limits"""
+        semaphore = asyncio.Semaphore(_MAX_CONCURRENT_REQUESTS)
+        
+        async def analyze(content: str, url: str) -> Dict:
+            async with semaphore:
+                return await self._aanalyze_all(content, url, questions, analyses)
+        
+        results = await asyncio.gather(
+            *(analyze(content, url) for content, url in contents), return_exceptions=True
+        )
+        return [
+            self._failed_results(analyses, result) if isinstance(result, Exception) else result
+            for result in results
+        ]
+    
+    async def _aanalyze_all(self, content: str, url: str = '', questions: Optional[List[str]] = None,
+                            analyses: Sequence[str] = _ANALYSES, max_length: int = 200) -> Dict:
+        """analyze_all on the service's event loop, awaiting the async client"""
+        if _is_trivial(content):
+            return {analysis: _trivial_result(analysis, content) for analysis in analyses}
+        questions = questions or _DEFAULT_QUESTIONS
+        results, pending = self._cached(analyses, content, url, questions, max_length)
+        embedding = None
+        if pending and self._semantic_cache is not None and self.aclient is not None:
+            embedding = await self._aembed(content)
+            pending = self._similar_cached(results, pending, embedding, url, questions, max_length)
+        
+        if pending and self.aclient is None:
+            results.update((analysis, _unavailable_result(analysis)) for analysis in pending)
+        elif pending:
+            try:
+                request = self._build_request(pending, content, url, questions, max_length)
+                await self._athrottle(self._request_tokens(request))
+                response = await self.aclient.chat.completions.create(**request)
+                _record_usage(pending, 'ok', response.usage)
+                answered = self._parse_response(pending, response.choices[0].message.content)
+            except Exception as e:
+                answered = self._failed_results(pending, e)
+            else:
+                self._store(answered, content, url, questions, max_length, embedding)
+            results.update(answered)
+        
+        return {analysis: results[analysis] for analysis in analyses}
+    
+    def _throttle(self, tokens: int) -> None:
+        """Wait until the rate limits allow a request of this many tokens"""
+        self._requests_limiter.acquire_blocking()
+        self._tokens_limiter.acquire_blocking(tokens)
+    
+    async def _athrottle(self, tokens: int) -> None:
+        """_throttle without blocking the event loop"""
+        await self._requests_limiter.acquire()
+        await self._tokens_limiter.acquire(tokens)
+    
+    @staticmethod
+    def _request_tokens(request: Dict) -> int:
+        """Tokens a chat request counts against the limit: its prompt plus the answer budget"""
+        # ~4 characters per token is close enough for a budget and spares tokenizing the prompt again
+        return sum(len(message['content']) for message in request['messages']) // 4 + request['max_tokens']
+    
+    def _cached(self, analyses: Sequence[str], content: str, url: str, questions: List[str],
+                max_length: int) -> Tuple[Dict, List[str]]:
+        """Cached results, and the analyses that still need a request"""
+        results = {}
+        pending = []
+        for analysis in analyses:
+            key = self._cache_key(analysis, content, url, questions, max_length)
+            cached = self._response_cache.get(key)
+            if cached is None and self._disk_cache is not None:
+                cached = self._disk_cache.get(key)
+                if cached is not None:
+                    self._response_cache.set(key, cached)
+            if cached is None:
+                pending.append(analysis)
+            else:
+                results[analysis] = cached
+        return results, pending
+    
+    def _store(self, answered: Dict, content: str, url: str, questions: List[str], max_length: int,
+               embedding=None) -> None:
+        """Cache freshly answered analyses"""
+        for analysis, result in answered.items():
+            key = self._cache_key(analysis, content, url, questions, max_length)
+            self._response_cache.set(key, result)
+            if self._disk_cache is not None:
+                self._disk_cache.set(key, result, expire=_CACHE_TTL)
+            if embedding is not None:
+                self._semantic_cache.add(self._semantic_namespace(analysis, url, questions, max_length), embedding, result)
+    
+    def _similar_cached(self, results: Dict, pending: List[str], embedding, url: str, questions: List[str],
+                        max_length: int) -> List[str]:
+        """Fill results from analyses of near-identical content; the analyses still pending"""
+        if embedding is None:
+            return pending
+        still_pending = []
+        for analysis in pending:
+            cached = self._semantic_cache.get(self._semantic_namespace(analysis, url, questions, max_length), embedding)
+            if cached is None:
+                still_pending.append(analysis)
+            else:
+                results[analysis] = cached
+        return still_pending
+    
+    def _embed(self, content: str):
+        """Unit-length embedding of the content, or None when the embedding request fails"""
+        text = content[:_EMBEDDING_INPUT_LENGTH]
+        key = ResponseCache.key(_EMBEDDING_MODEL, text)
+        embedding = self._embedding_cache.get(key)
+        if embedding is None:
+            try:
+                self._throttle(len(text) // 4)
+                response = self.client.embeddings.create(model=_EMBEDDING_MODEL, input=text)
+            except Exception as e:
+                logging.warning(f"OpenAI embedding failed, skipping semantic cache: {str(e)}")
+                return None
+            embedding = SemanticCache.normalize(response.data[0].embedding)
+            self._embedding_cache.set(key, embedding)
+        return embedding
+    
+    async def _aembed(self, content: str):
+        """_embed on the service's event loop, awaiting the async client"""
+        text = content[:_EMBEDDING_INPUT_LENGTH]
+        key = ResponseCache.key(_EMBEDDING_MODEL, text)
+        embedding = self._embedding_cache.get(key)
+        if embedding is None:
+            try:
+                await self._athrottle(len(text) // 4)
+                response = await self.aclient.embeddings.create(model=_EMBEDDING_MODEL, input=text)
+            except Exception as e:
+                logging.warning(f"OpenAI embedding failed, skipping semantic cache: {str(e)}")
+                return None
+            embedding = SemanticCache.normalize(response.data[0].embedding)
+            self._embedding_cache.set(key, embedding)
+        return embedding
+    
+    @staticmethod
+    def _failed_results(analyses: Sequence[str], e: Exception) -> Dict:
+        """Failure result for each analysis of a request that raised e"""
+        _record_usage(analyses, 'failed')
+        results = {}
+        for analysis in analyses:
+            logging.error(f"OpenAI {_FAILURE_LOG_LABELS[analysis]} failed: {str(e)}")
+            results[analysis] = _failed_result(analysis, e)
+        return results
+    
+    @staticmethod
+    def _semantic_namespace(analysis: str, url: str, questions: List[str], max_length: int) -> str:
+        """Semantic-cache index for an analysis: its cache key inputs without the content"""
+        # Near-duplicates are often the same page under another URL, so only the host is kept
+        # (for the URL-dependent understanding analysis); templated pages of other sites don't match
+        try:
+            host = urlsplit(url).hostname or ''
+        except ValueError:
+            host = ''
+        return OpenAIService._cache_key(analysis, '', host, questions, max_length)
+    
+    @staticmethod
+    def _cache_key(analysis: str, content: str, url: str, questions: List[str], max_length: int) -> str:
+        """Cache key covering only the inputs the analysis depends on"""
+        # Text past the analysis' limit is never sent, so it must not split the cache
+        content = truncate_content(content, _CONTENT_LIMITS[analysis])
+        if analysis == 'understanding':
+            return ResponseCache.key(_MODEL, analysis, content, url)
+        if analysis == 'answerability':
+            return ResponseCache.key(_MODEL, analysis, content, '\n'.join(questions))
+        if analysis == 'summary':
+            return ResponseCache.key(_MODEL, analysis, content, str(max_length))
+        return ResponseCache.key(_MODEL, analysis, content)
+    
+    def _build_request(self, analyses: List[str], content: str, url: str, questions: List[str],
+                       max_length: int) -> Dict:
+        """chat.completions.create arguments answering analyses"""
+        if len(analyses) == 1:
+            system, prompt = self._single_prompt(analyses[0], content, url, questions, max_length)
+        else:
+            system, prompt = _COMBINED_SYSTEM_PROMPT, self._combined_prompt(analyses, content, url, questions, max_length)
+        
+        max_tokens = sum(_MAX_TOKENS[analysis] for analysis in analyses if analysis != 'summary')
+        if 'summary' in analyses:
+            # A summary needs no more tokens than the text it summarizes (but always a sentence's worth)
+            content_tokens = count_tokens(truncate_content(content, _CONTENT_LIMITS['summary']))
+            max_tokens += max(_MIN_SUMMARY_TOKENS, min(_MAX_TOKENS['summary'], content_tokens))
+        
+        request = {
+            'model': _MODEL,
+            'messages': [
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt}
+            ],
+            'max_tokens': max_tokens,
+            'temperature': 0.3
+        }
+        if analyses != ['summary']:
+            request['response_format'] = _response_format(tuple(analyses))
+            request['messages'][1]['content'] += _json_mode_instructions(tuple(analyses))
+        return request
+    
+    @staticmethod
+    def _single_prompt(analysis: str, content: str, url: str, questions: List[str],
+                       max_length: int) -> Tuple[str, str]:
+        """System and user prompt for one analysis on its own"""
+        if analysis == 'understanding':
+            # Same truncated prompt as MultiAIService, so both share the provider's prompt cache
+            return UNDERSTANDING_SYSTEM_PROMPT, build_understanding_prompt(url, content)
+        if analysis == 'tone':
+            return _TONE_SYSTEM_PROMPT, "".join((
+                _TONE_PROMPT_PREFIX, truncate_content(content, _CONTENT_LIMITS['tone']), _TONE_PROMPT_SUFFIX
+            ))
+        if analysis == 'answerability':
+            return _ANSWERABILITY_SYSTEM_PROMPT, "".join((
+                _ANSWERABILITY_PROMPT_PREFIX, truncate_content(content, _CONTENT_LIMITS['answerability']),
+                _ANSWERABILITY_QUESTIONS_LABEL, ', '.join(questions), _ANSWERABILITY_PROMPT_SUFFIX
+            ))
+        return _SUMMARY_SYSTEM_PROMPT, f"Summarize in {max_length} chars: {truncate_content(content, _CONTENT_LIMITS['summary'])}"
+    
+    @staticmethod
+    def _combined_prompt(analyses: List[str], content: str, url: str, questions: List[str],
+                         max_length: int) -> str:
+        """User prompt asking for several analyses in one JSON object"""
+        # The page content is sent once, cut to the longest limit any requested analysis reads
+        content = truncate_content(content, max(_CONTENT_LIMITS[analysis] for analysis in analyses))
+        parts = [f"Analyze this content. URL: {url}\n\nContent: {content}\n\n"]
+        if 'answerability' in analyses:
+            parts.append(f"Questions: {', '.join(questions)}\n\n")
+        parts.append("Respond with one JSON object containing these keys:\n")
+        for analysis in analyses:
+            parts.append(f"- {_COMBINED_SECTIONS[analysis].replace('{max_length}', str(max_length))}\n")
+        return "".join(parts)
+    
+    @staticmethod
+    def _parse_response(analyses: List[str], response_content: str) -> Dict:
+        """Split the model's answer into one result per analysis"""
+        response_content = response_content.strip()
+        if analyses == ['summary']:
+            return {'summary': response_content}
+        
+        # Log the raw response for debugging
+        logging.debug(f"OpenAI response: {response_content[:200]}...")
+        result = _loads_json(response_content)
+        if len(analyses) == 1:
+            return {analyses[0]: _RESULT_BUILDERS[analyses[0]](result, response_content)}
+        
+        results = {}
+        for analysis in analyses:
+            section = result.get(analysis)
+            if analysis == 'summary':
+                results[analysis] = str(section or '').strip()
+                continue
+            if not isinstance(section, dict):
+                section = {}
+            results[analysis] = _RESULT_BUILDERS[analysis](section, dumps(section))
+        return results
+    
+    def analyze_content_understanding(self, content: str, url: str) -> Dict:
+        """
+        Analyze if AI can understand the content clearly
+        """
+        return self.analyze_all(content, url, analyses=('understanding',))['understanding']
     
     def analyze_tone_and_sentiment(self, content: str) -> Dict:
         """
         Analyze content tone and sentiment using OpenAI
         """
-        if not self._is_available():
-            return {
-                'score': 0,
-                'error': 'OpenAI service not available',
-                'tone': 'unknown',
-                'sentiment': 'neutral',
-                'recommendations': ['Configure OpenAI API key']
-            }
-        
-        try:
-            # Truncate content to reduce costs
-            max_content_length = 1500  # Reduced from 6000
-            if len(content) > max_content_length:
-                content = content[:max_content_length] + "..."
-            
-            # Shorter prompt to reduce costs
-            prompt = f"""Analyze tone and sentiment: {content}
-
-Provide tone, sentiment, confidence (0-100), emotional indicators, and recommendations.
-
-JSON:
-{{
-    "tone": "string",
-    "sentiment": "string", 
-    "confidence": number,
-    "emotional_indicators": ["indicator1", "indicator2"],
-    "recommendations": ["rec1", "rec2"]
-}}"""
-            
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",  # Use cheaper model
-                messages=[
-                    {"role": "system", "content": "Tone and sentiment analyst. JSON only."},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={"type": "json_object"},
-                max_tokens=300,  # Reduced from 500
-                temperature=0.3
-            )
-            
-            import json
-            response_content = response.choices[0].message.content.strip()
-            logging.debug(f"OpenAI tone analysis response: {response_content[:200]}...")
-            result = json.loads(response_content)
-            
-            # Calculate score based on sentiment and tone appropriateness
-            sentiment_scores = {'Positive': 80, 'Neutral': 60, 'Negative': 20}
-            tone_scores = {'Professional': 90, 'Academic': 85, 'Technical': 80, 'Friendly': 75, 'Casual': 60}
-            
-            sentiment_score = sentiment_scores.get(result.get('sentiment', 'Neutral'), 60)
-            tone_score = tone_scores.get(result.get('tone', 'Casual'), 50)
-            
-            # Average the scores
-            score = (sentiment_score + tone_score) // 2
-            
-            return {
-                'score': score,
-                'tone': result.get('tone', 'Unknown'),
-                'sentiment': result.get('sentiment', 'Neutral'),
-                'confidence': result.get('confidence', 0),
-                'emotional_indicators': result.get('emotional_indicators', []),
-                'recommendations': result.get('recommendations', []),
-                'ai_feedback': response.choices[0].message.content
-            }
-            
-        except Exception as e:
-            logging.error(f"OpenAI tone analysis failed: {str(e)}")
-            return {
-                'score': 0,
-                'error': f'Tone analysis failed: {str(e)}',
-                'tone': 'unknown',
-                'sentiment': 'neutral',
-                'recommendations': ['Retry analysis or check API configuration']
-            }
+        return self.analyze_all(content, analyses=('tone',))['tone']
     
     def analyze_answerability(self, content: str, questions: List[str] = None) -> Dict:
         """
         Analyze content answerability using AI feedback
         """
-        if not self._is_available():
-            return {
-                'score': 0,
-                'error': 'OpenAI service not available',
-                'ai_answerability_score': 0,
-                'gpt_feedback': 'Service not available',
-                'recommendations': ['Configure OpenAI API key']
-            }
-        
-        try:
-            # Truncate content to reduce costs
-            max_content_length = 1500  # Reduced from 6000
-            if len(content) > max_content_length:
-                content = content[:max_content_length] + "..."
-            
-            # Generate questions if not provided
-            if not questions:
-                questions = [
-                    "What is the main topic?",
-                    "What problem does this solve?",
-                    "What are the key benefits?",
-                    "What action should be taken?"
-                ]
-            
-            # Shorter prompt to reduce costs
-            prompt = f"""Analyze answerability: {content}
-
-Questions: {', '.join(questions)}
-
-Rate how well content answers questions (0-100), what's answered clearly, what's unclear, and recommendations.
-
-JSON:
-{{
-    "ai_answerability_score": number,
-    "answered_questions": ["q1", "q2"],
-    "unanswered_questions": ["q1", "q2"],
-    "clarity_issues": ["issue1", "issue2"],
-    "recommendations": ["rec1", "rec2"]
-}}"""
-            
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",  # Use cheaper model
-                messages=[
-                    {"role": "system", "content": "Answerability analyst. JSON only."},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={"type": "json_object"},
-                max_tokens=400,  # Reduced from 800
-                temperature=0.3
-            )
-            
-            import json
-            response_content = response.choices[0].message.content.strip()
-            logging.debug(f"OpenAI answerability response: {response_content[:200]}...")
-            result = json.loads(response_content)
-            
-            return {
-                'score': result.get('ai_answerability_score', 0),
-                'ai_answerability_score': result.get('ai_answerability_score', 0),
-                'answered_questions': result.get('answered_questions', []),
-                'unanswered_questions': result.get('unanswered_questions', []),
-                'clarity_issues': result.get('clarity_issues', []),
-                'recommendations': result.get('recommendations', []),
-                'gpt_feedback': response.choices[0].message.content
-            }
-            
-        except Exception as e:
-            logging.error(f"OpenAI answerability analysis failed: {str(e)}")
-            return {
-                'score': 0,
-                'error': f'Answerability analysis failed: {str(e)}',
-                'ai_answerability_score': 0,
-                'gpt_feedback': 'Analysis failed',
-                'recommendations': ['Retry analysis or check API configuration']
-            }
+        return self.analyze_all(content, questions=questions, analyses=('answerability',))['answerability']
     
     def generate_content_summary(self, content: str, max_length: int = 200) -> str:
         """
         Generate AI-powered content summary
         """
+        return "".join(self.stream_content_summary(content, max_length)).strip()
+    
+    def stream_content_summary(self, content: str, max_length: int = 200) -> Iterator[str]:
+        """
+        Generate AI-powered content summary, yielding text as the model produces it
+        """
+        if _is_trivial(content):
+            yield _trivial_result('summary', content)
+            return
+        results, pending = self._cached(('summary',), content, '', _DEFAULT_QUESTIONS, max_length)
+        if not pending:
+            yield results['summary']
+            return
         if not self._is_available():
-            return "OpenAI service not available for summarization"
+            yield _unavailable_result('summary')
+            return
         
+        parts = []
         try:
-            # Truncate content to reduce costs
-            max_content_length = 1000  # Reduced from 4000
-            if len(content) > max_content_length:
-                content = content[:max_content_length] + "..."
-            
-            # Shorter prompt to reduce costs
-            prompt = f"""Summarize in {max_length} chars: {content}"""
-            
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "Concise summarizer."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=200,  # Reduced from 300
-                temperature=0.3
+            request = self._build_request(pending, content, '', _DEFAULT_QUESTIONS, max_length)
+            self._throttle(self._request_tokens(request))
+            stream = self.client.chat.completions.create(
+                stream=True, stream_options={"include_usage": True}, **request
             )
-            
-            return response.choices[0].message.content.strip()
-            
+            usage = None
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    yield parts[-1]
+                # Usage arrives on a final chunk without choices
+                usage = getattr(chunk, 'usage', None) or usage
+            _record_usage(pending, 'ok', usage)
         except Exception as e:
-            logging.error(f"OpenAI summarization failed: {str(e)}")
-            return f"Summarization failed: {str(e)}"
+            summary = self._failed_results(pending, e)['summary']
+            # Text already streamed stays with the caller; only report the failure otherwise
+            if not parts:
+                yield summary
+            return
+        self._store({'summary': "".join(parts).strip()}, content, '', _DEFAULT_QUESTIONS, max_length)
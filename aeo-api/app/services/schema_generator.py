@@ -7,7 +7,11 @@ import os
 import json
 import logging
 from typing import Dict, Any, Optional
-from bs4 import BeautifulSoup
+from lxml import etree
+try:
+    from ._html import parse_html
+except ImportError:
+    from _html import parse_html
 
 try:
     from openai import OpenAI
@@ -17,6 +21,46 @@ except ImportError:
     logging.warning("OpenAI not available for schema generation")
 
 
+def _has_price_class(classes: Optional[str]) -> bool:
+    """Whether a class attribute mentions a price"""
+    return bool(classes) and 'price' in classes.lower()
+
+
+# Text of an element, leaving out script, style and template contents
+_ELEMENT_TEXT = etree.XPath(
+    "descendant::text()[not(ancestor::script or ancestor::style or ancestor::template)]"
+)
+
+
+def _element_text(element) -> str:
+    """Visible text of a title or heading element, stripped"""
+    return ''.join(_ELEMENT_TEXT(element)).strip()
+
+
+# Subtrees left out of the body preview
+_PREVIEW_SKIP_TAGS = ('script', 'style', 'nav', 'header', 'footer')
+_BODY_PREVIEW_LENGTH = 800
+
+
+def _body_preview(tree) -> str:
+    """Start of the page's body text, without scripts, styles and page chrome (stripped from tree in place)"""
+    body = tree.find('body')
+    if body is None:
+        return ''
+    etree.strip_elements(body, etree.Comment, *_PREVIEW_SKIP_TAGS, with_tail=False)
+    # Stop reading text once the preview is full
+    parts = []
+    length = 0
+    for text in body.itertext():
+        text = text.strip()
+        if text:
+            parts.append(text)
+            length += len(text) + 1
+            if length > _BODY_PREVIEW_LENGTH:
+                break
+    return ' '.join(parts)[:_BODY_PREVIEW_LENGTH]
+
+
 class SchemaGenerator:
     """Generate Schema.org markup using AI analysis"""
     
@@ -34,29 +78,74 @@ class SchemaGenerator:
     def extract_page_content(self, html: str, url: str) -> Dict[str, Any]:
         """Extract relevant content from HTML for schema generation"""
         try:
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # Extract basic information
-            title = soup.find('title')
-            title_text = title.get_text().strip() if title else ''
+            tree = parse_html(html)
             
-            # Meta tags
-            meta_desc = soup.find('meta', attrs={'name': 'description'})
-            description = meta_desc.get('content', '').strip() if meta_desc else ''
+            # Collect every inspected tag in one walk over the tree
+            title = meta_desc = og_title = og_description = og_image = author_meta = None
+            article_tag = time_tag = address_tag = None
+            h1s, h2s, h3s, imgs, hrefs = [], [], [], [], []
+            has_price = False
+            for el in tree.iter():
+                name = el.tag
+                if not isinstance(name, str):
+                    # Comments and processing instructions
+                    continue
+                if not has_price and _has_price_class(el.get('class')):
+                    has_price = True
+                if name == 'a':
+                    href = el.get('href')
+                    if href is not None:
+                        hrefs.append(href)
+                elif name == 'meta':
+                    meta_name = el.get('name')
+                    meta_property = el.get('property')
+                    if meta_desc is None and meta_name == 'description':
+                        meta_desc = el
+                    if author_meta is None and meta_name == 'author':
+                        author_meta = el
+                    if og_title is None and meta_property == 'og:title':
+                        og_title = el
+                    elif og_description is None and meta_property == 'og:description':
+                        og_description = el
+                    elif og_image is None and meta_property == 'og:image':
+                        og_image = el
+                elif name == 'h1':
+                    h1s.append(el)
+                elif name == 'h2':
+                    if len(h2s) < 10:  # First 10 H2s for services
+                        h2s.append(el)
+                elif name == 'h3':
+                    if len(h3s) < 10:  # First 10 H3s
+                        h3s.append(el)
+                elif name == 'img':
+                    if len(imgs) < 10:
+                        imgs.append(el)
+                elif name == 'title':
+                    if title is None:
+                        title = el
+                elif name == 'article':
+                    if article_tag is None:
+                        article_tag = el
+                elif name == 'time':
+                    if time_tag is None:
+                        time_tag = el
+                elif name == 'address':
+                    if address_tag is None:
+                        address_tag = el
             
-            og_title = soup.find('meta', property='og:title')
-            og_description = soup.find('meta', property='og:description')
-            og_image = soup.find('meta', property='og:image')
+            # Extract basic information
+            title_text = _element_text(title) if title is not None else ''
+            description = meta_desc.get('content', '').strip() if meta_desc is not None else ''
             
             # Headings
-            h1_tags = [h.get_text().strip() for h in soup.find_all('h1')]
-            h2_tags = [h.get_text().strip() for h in soup.find_all('h2')[:10]]  # First 10 H2s for services
-            h3_tags = [h.get_text().strip() for h in soup.find_all('h3')[:10]]  # First 10 H3s
+            h1_tags = [_element_text(h) for h in h1s]
+            h2_tags = [_element_text(h) for h in h2s]
+            h3_tags = [_element_text(h) for h in h3s]
             
             # Images (including logo detection)
             images = []
             logo_img = None
-            for img in soup.find_all('img')[:10]:
+            for img in imgs:
                 src = img.get('src', '')
                 alt = img.get('alt', '').lower()
                 if src:
@@ -67,26 +156,16 @@ class SchemaGenerator:
             
             # Social media links
             social_links = []
-            for link in soup.find_all('a', href=True):
-                href = link.get('href', '')
+            for href in hrefs:
                 if any(domain in href for domain in ['facebook.com', 'twitter.com', 'linkedin.com', 'instagram.com', 'youtube.com', 'pinterest.com']):
                     social_links.append(href)
             
-            # Article/Blog indicators
-            article_tag = soup.find('article')
-            time_tag = soup.find('time')
-            author_meta = soup.find('meta', attrs={'name': 'author'})
-            
             # Date published/modified
-            date_published = time_tag.get('datetime', '') if time_tag else ''
+            date_published = time_tag.get('datetime', '') if time_tag is not None else ''
             
             # Business indicators
-            address_tag = soup.find('address')
-            phone_links = [a.get('href', '').replace('tel:', '') for a in soup.find_all('a', href=lambda x: x and 'tel:' in x)]
-            email_links = [a.get('href', '').replace('mailto:', '') for a in soup.find_all('a', href=lambda x: x and 'mailto:' in x)]
-            
-            # Product indicators
-            price_elements = soup.find_all(class_=lambda x: x and ('price' in x.lower() if isinstance(x, str) else False))
+            phone_links = [href.replace('tel:', '') for href in hrefs if 'tel:' in href]
+            email_links = [href.replace('mailto:', '') for href in hrefs if 'mailto:' in href]
             
             # Services detection (from H2/H3 tags and lists)
             services = []
@@ -104,21 +183,16 @@ class SchemaGenerator:
                 company_name = parts
             
             # Extract some body text (first 800 chars for better context)
-            body_text = ''
-            body = soup.find('body')
-            if body:
-                # Remove script and style elements
-                for script in body(['script', 'style', 'nav', 'header', 'footer']):
-                    script.decompose()
-                body_text = body.get_text(separator=' ', strip=True)[:800]
+            # Last: building the preview strips page chrome from the tree
+            body_text = _body_preview(tree)
             
             return {
                 'url': url,
                 'title': title_text,
                 'description': description,
-                'og_title': og_title.get('content', '') if og_title else '',
-                'og_description': og_description.get('content', '') if og_description else '',
-                'og_image': og_image.get('content', '') if og_image else '',
+                'og_title': og_title.get('content', '') if og_title is not None else '',
+                'og_description': og_description.get('content', '') if og_description is not None else '',
+                'og_image': og_image.get('content', '') if og_image is not None else '',
                 'company_name': company_name,
                 'h1_tags': h1_tags,
                 'h2_tags': h2_tags,
@@ -126,15 +200,15 @@ class SchemaGenerator:
                 'images': images,
                 'logo': logo_img or (images[0]['src'] if images else ''),
                 'social_links': list(set(social_links))[:10],  # Unique social links
-                'has_article': bool(article_tag),
-                'has_time': bool(time_tag),
-                'has_author': bool(author_meta),
-                'has_address': bool(address_tag),
+                'has_article': article_tag is not None,
+                'has_time': time_tag is not None,
+                'has_author': author_meta is not None,
+                'has_address': address_tag is not None,
                 'has_phone': len(phone_links) > 0,
                 'has_email': len(email_links) > 0,
-                'has_price': len(price_elements) > 0,
+                'has_price': has_price,
                 'body_preview': body_text,
-                'author': author_meta.get('content', '') if author_meta else '',
+                'author': author_meta.get('content', '') if author_meta is not None else '',
                 'date_published': date_published,
                 'phone_numbers': phone_links[:3],
                 'email_addresses': email_links[:3],
@@ -0,0 +1,60 @@
+import pytest
+
+from app.services import ai_presence
+
+
+@pytest.fixture
+def service(monkeypatch):
+    """AIPresenceService without AI provider clients"""
+    monkeypatch.setattr(ai_presence, 'OpenAIService', lambda: None)
+    monkeypatch.setattr(ai_presence, 'MultiAIService', lambda: None)
+    return ai_presence.AIPresenceService()
+
+
+ALL_ALLOWED = {
+    'robots_gptbot': True,
+    'robots_google-extended': True,
+    'robots_claudebot': True,
+    'sitemap_present': False,
+}
+
+
+def test_empty_robots_allows_every_bot(service):
+    assert service._parse_robots_rules('') == ALL_ALLOWED
+
+
+def test_named_agent_disallow_blocks_only_that_bot(service):
+    checks = service._parse_robots_rules('User-agent: GPTBot\nDisallow: /\n')
+    assert checks == {**ALL_ALLOWED, 'robots_gptbot': False}
+
+
+@pytest.mark.parametrize('agent,check', [
+    ('gptbot', 'robots_gptbot'),
+    ('GOOGLE-EXTENDED', 'robots_google-extended'),
+    ('ClaudeBot', 'robots_claudebot'),
+    ('anthropic-ai', 'robots_claudebot'),
+])
+def test_agent_names_map_to_bot_labels_case_insensitively(service, agent, check):
+    checks = service._parse_robots_rules(f'user-agent:  {agent}  \ndisallow: /')
+    assert checks[check] is False
+    assert [key for key in ALL_ALLOWED if key.startswith('robots_') and not checks[key]] == [check]
+
+
+def test_wildcard_disallow_blocks_every_bot(service):
+    checks = service._parse_robots_rules('User-agent: *\nDisallow: /')
+    assert checks == dict.fromkeys(ALL_ALLOWED, False)
+
+
+def test_unknown_agents_and_partial_disallows_are_ignored(service):
+    robots = (
+        '# comment\n'
+        'User-agent: Googlebot\nDisallow: /\n'
+        'User-agent: GPTBot-Extra\nDisallow: /\n'
+        'User-agent: ClaudeBot\nDisallow: /private\n'
+    )
+    assert service._parse_robots_rules(robots) == ALL_ALLOWED
+
+
+def test_sitemap_line_is_detected(service):
+    checks = service._parse_robots_rules('Sitemap: https://example.com/sitemap.xml')
+    assert checks['sitemap_present'] is True
@@ -0,0 +1,63 @@
+import asyncio
+import json
+
+import pytest
+
+from app.services.multi_ai_service import _canonical_url, _read_json_stream
+
+ANSWER = 'Sure! ```json\n{"level": "Good", "note": "a \\"quoted\\" {brace}\\\\", "nested": {"x": [1, {"y": 2}]}}\n``` Hope this helps {'
+OBJECT = ANSWER[ANSWER.index('{'):ANSWER.index('}\n```') + 1]
+
+
+async def _chunks(parts):
+    for part in parts:
+        yield part
+
+
+def _read(parts):
+    return asyncio.run(_read_json_stream(_chunks(parts)))
+
+
+def test_reads_first_json_object_in_one_chunk():
+    text, json_text = _read([ANSWER])
+    assert json_text == OBJECT
+    assert json.loads(json_text)['nested'] == {'x': [1, {'y': 2}]}
+    # Reading stops where the object closes
+    assert text == ANSWER[:ANSWER.index(OBJECT) + len(OBJECT)]
+
+
+@pytest.mark.parametrize('split', range(1, len(ANSWER)))
+def test_object_is_found_at_any_chunk_boundary(split):
+    _, json_text = _read([ANSWER[:split], ANSWER[split:]])
+    assert json_text == OBJECT
+
+
+def test_object_is_found_in_single_character_chunks():
+    _, json_text = _read(list(ANSWER))
+    assert json_text == OBJECT
+
+
+def test_backslash_split_from_the_character_it_escapes():
+    answer = '{"a": "x\\"}", "b": 1}'
+    split = answer.index('\\') + 1
+    _, json_text = _read([answer[:split], answer[split:]])
+    assert json_text == answer
+
+
+def test_unclosed_or_missing_object_gives_none():
+    assert _read(['no json here']) == ('no json here', None)
+    assert _read(['{"a": ', '"b"']) == ('{"a": "b"', None)
+
+
+def test_canonical_url_drops_tracking_parameters_and_fragment():
+    url = 'https://example.com/pricing?plan=pro&utm_source=x&UTM_Medium=y&gclid=1&fbclid=2#top'
+    assert _canonical_url(url) == 'https://example.com/pricing?plan=pro'
+
+
+def test_canonical_url_keeps_other_parameters_in_order():
+    assert _canonical_url('https://example.com/?b=2&a=1&ref=nav') == 'https://example.com/?b=2&a=1'
+
+
+def test_canonical_url_returns_clean_urls_unchanged():
+    for url in ('https://example.com/a?x=1&y=', 'https://example.com/', 'not a url'):
+        assert _canonical_url(url) == url
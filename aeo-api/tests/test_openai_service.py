@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from app.services import openai_service
+
+
+@pytest.fixture
+def structured_outputs(monkeypatch):
+    """Switch the model's Structured Outputs support, clearing the cached formats"""
+    def set_support(supported):
+        monkeypatch.setattr(openai_service, '_STRUCTURED_OUTPUTS', supported)
+        openai_service._response_format.cache_clear()
+        openai_service._json_mode_instructions.cache_clear()
+    yield set_support
+    openai_service._response_format.cache_clear()
+    openai_service._json_mode_instructions.cache_clear()
+
+
+def test_single_analysis_gets_its_strict_schema(structured_outputs):
+    structured_outputs(True)
+    response_format = openai_service._response_format(('tone',))
+    assert response_format['type'] == 'json_schema'
+    assert response_format['json_schema']['strict'] is True
+    assert response_format['json_schema']['schema'] == openai_service._ANALYSIS_SCHEMAS['tone']
+
+
+def test_combined_analyses_get_one_object_with_every_section(structured_outputs):
+    structured_outputs(True)
+    schema = openai_service._response_format(('answerability', 'summary'))['json_schema']['schema']
+    assert schema['required'] == ['answerability', 'summary']
+    assert schema['additionalProperties'] is False
+    assert set(schema['properties']) == {'answerability', 'summary'}
+
+
+def test_models_without_structured_outputs_get_json_mode(structured_outputs):
+    structured_outputs(False)
+    assert openai_service._response_format(('tone',)) == {'type': 'json_object'}
+
+
+def test_json_mode_prompt_spells_out_the_schema_keys(structured_outputs):
+    structured_outputs(False)
+    instructions = openai_service._json_mode_instructions(('answerability', 'tone'))
+    shape = json.loads(instructions.split('\n')[-1])
+    assert set(shape) == {'answerability', 'tone'}
+    assert set(shape['answerability']) == set(openai_service._ANALYSIS_SCHEMAS['answerability']['properties'])
+    assert shape['tone']['tone'] == '|'.join(openai_service.TONE_SCORES)
+
+
+def test_structured_outputs_prompts_carry_no_shape(structured_outputs):
+    structured_outputs(True)
+    assert openai_service._json_mode_instructions(('tone',)) == ''
+
+
+@pytest.mark.parametrize('model,supported', [
+    ('gpt-4o-mini', True),
+    ('gpt-4o-2024-08-06', True),
+    ('gpt-4.1-mini', True),
+    ('gpt-4o-2024-05-13', False),
+    ('gpt-3.5-turbo', False),
+    ('gpt-4-turbo', False),
+])
+def test_structured_outputs_model_gating(model, supported):
+    assert openai_service._supports_structured_outputs(model) is supported
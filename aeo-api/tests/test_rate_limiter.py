@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services import _rate_limiter
+from app.services._rate_limiter import RateLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Frozen monotonic clock; sleeps are recorded instead of waited"""
+    state = {'now': 1000.0, 'sleeps': []}
+    monkeypatch.setattr(_rate_limiter.time, 'monotonic', lambda: state['now'])
+    monkeypatch.setattr(_rate_limiter.time, 'sleep', state['sleeps'].append)
+    return state
+
+
+def test_within_budget_does_not_wait(clock):
+    limiter = RateLimiter(3, period=3.0)
+    for _ in range(3):
+        limiter.acquire_blocking()
+    assert clock['sleeps'] == []
+
+
+def test_over_budget_waits_for_refill(clock):
+    limiter = RateLimiter(2, period=2.0)  # refills 1 unit per second
+    limiter.acquire_blocking()
+    limiter.acquire_blocking()
+    limiter.acquire_blocking()
+    assert clock['sleeps'] == [pytest.approx(1.0)]
+
+
+def test_later_callers_queue_behind_reservations(clock):
+    limiter = RateLimiter(1, period=1.0)
+    limiter.acquire_blocking()
+    limiter.acquire_blocking()
+    limiter.acquire_blocking()
+    assert clock['sleeps'] == [pytest.approx(1.0), pytest.approx(2.0)]
+
+
+def test_bucket_refills_over_time_up_to_max_rate(clock):
+    limiter = RateLimiter(2, period=2.0)
+    limiter.acquire_blocking(2)
+    clock['now'] += 100.0
+    limiter.acquire_blocking(2)
+    assert clock['sleeps'] == []
+    limiter.acquire_blocking(1)
+    assert clock['sleeps'] == [pytest.approx(1.0)]
+
+
+def test_amount_is_taken_from_the_bucket(clock):
+    limiter = RateLimiter(100, period=60.0)
+    limiter.acquire_blocking(90)
+    limiter.acquire_blocking(20)
+    assert clock['sleeps'] == [pytest.approx(10 * 60.0 / 100)]
+
+
+def test_async_acquire_sleeps_on_the_event_loop(clock, monkeypatch):
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(_rate_limiter.asyncio, 'sleep', fake_sleep)
+    limiter = RateLimiter(1, period=1.0)
+
+    async def acquire_twice():
+        await limiter.acquire()
+        await limiter.acquire()
+
+    asyncio.run(acquire_twice())
+    assert delays == [pytest.approx(1.0)]
+    assert clock['sleeps'] == []
+
+
+def test_openai_limiters_are_shared_module_singletons():
+    assert isinstance(_rate_limiter.OPENAI_REQUESTS_LIMITER, RateLimiter)
+    assert isinstance(_rate_limiter.OPENAI_TOKENS_LIMITER, RateLimiter)
+    assert _rate_limiter.OPENAI_REQUESTS_LIMITER is not _rate_limiter.OPENAI_TOKENS_LIMITER
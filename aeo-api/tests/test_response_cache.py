@@ -0,0 +1,69 @@
+import pytest
+
+from app.services import _response_cache
+from app.services._response_cache import ResponseCache
+
+
+@pytest.fixture
+def now(monkeypatch):
+    """Controllable wall clock for TTL checks"""
+    state = {'now': 1000.0}
+    monkeypatch.setattr(_response_cache.time, 'time', lambda: state['now'])
+    return state
+
+
+def test_key_depends_on_model_and_every_part():
+    key = ResponseCache.key('model', 'a', 'b')
+    assert key == ResponseCache.key('model', 'a', 'b')
+    assert key != ResponseCache.key('other', 'a', 'b')
+    assert key != ResponseCache.key('model', 'a', 'c')
+    # Parts are separated, so moving text between them changes the key
+    assert key != ResponseCache.key('model', 'ab', '')
+
+
+def test_key_accepts_raw_bytes():
+    assert ResponseCache.key('m', b'caf\xc3\xa9') == ResponseCache.key('m', 'café')
+    assert ResponseCache.key('m', 'utf-8', b'x') != ResponseCache.key('m', 'latin-1', b'x')
+
+
+def test_missing_key_is_none(now):
+    assert ResponseCache().get('missing') is None
+
+
+def test_values_are_copied_in_and_out(now):
+    cache = ResponseCache()
+    value = {'score': 1, 'items': [1]}
+    cache.set('k', value)
+    value['items'].append(2)
+    cached = cache.get('k')
+    assert cached == {'score': 1, 'items': [1]}
+    cached['items'].append(3)
+    assert cache.get('k') == {'score': 1, 'items': [1]}
+
+
+def test_entries_expire_after_ttl(now):
+    cache = ResponseCache(ttl=10)
+    cache.set('k', 'v')
+    now['now'] += 9.9
+    assert cache.get('k') == 'v'
+    now['now'] += 0.1
+    assert cache.get('k') is None
+
+
+def test_least_recently_used_entry_is_evicted(now):
+    cache = ResponseCache(max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    # Reading 'a' makes 'b' the least recently used
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+
+
+def test_clear_drops_every_entry(now):
+    cache = ResponseCache()
+    cache.set('a', 1)
+    cache.clear()
+    assert cache.get('a') is None